@@ -0,0 +1,119 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+# Сверка и микробенчмарк разбора maven-metadata.xml: BeautifulSoup (прежняя реализация) против lxml.
+#   python bench/bench_metadata.py                 # сверка на bench/metadata_corpus и замеры
+#   python bench/bench_metadata.py --check-only    # только сверка, код возврата 1 при расхождении
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "bot"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from maven_metadata import MavenMetadata, parse_metadata, parse_release  # noqa: E402
+from stub_server import build_metadata  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metadata_corpus")
+
+
+def soup_release(content: bytes) -> str:
+    # Ровно то, что делал parse_pom_version до перехода на lxml
+    soup = BeautifulSoup(content, "lxml-xml")
+    return soup.find("release").text.strip()
+
+
+def soup_metadata(content: bytes) -> MavenMetadata:
+    soup = BeautifulSoup(content, "lxml-xml")
+
+    def text(name: str) -> str | None:
+        tag = soup.find(name)
+        return tag.text.strip() if tag is not None else None
+
+    versions = soup.find("versions")
+    return MavenMetadata(
+        soup.find("release").text.strip(),
+        text("latest"),
+        text("lastUpdated"),
+        tuple(tag.text.strip() for tag in versions.find_all("version", recursive=False)) if versions else (),
+    )
+
+
+def outcome(parse, content: bytes):
+    # Для битых документов сравниваем только факт ошибки, а не её тип
+    try:
+        return parse(content)
+    except Exception:
+        return "<ошибка>"
+
+
+def check_corpus() -> int:
+    mismatches = 0
+    paths = sorted(glob.glob(os.path.join(CORPUS_DIR, "*.xml")))
+    for path in paths:
+        with open(path, "rb") as f:
+            content = f.read()
+        name = os.path.basename(path)
+        for label, expected, actual in (
+            ("release", outcome(soup_release, content), outcome(parse_release, content)),
+            ("metadata", outcome(soup_metadata, content), outcome(parse_metadata, content)),
+        ):
+            if expected != actual:
+                mismatches += 1
+                print(f"РАСХОЖДЕНИЕ {name} [{label}]: {expected!r} != {actual!r}", file=sys.stderr)
+    print(f"Сверено файлов: {len(paths)}, расхождений: {mismatches}", file=sys.stderr)
+    return mismatches
+
+
+def measure(parse, content: bytes, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        parse(content)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Сверка и микробенчмарк разбора maven-metadata.xml")
+    parser.add_argument("--sizes", default="10,50,500", help="количество <version> в сгенерированных файлах")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--check-only", action="store_true")
+    parser.add_argument("--output", help="куда записать JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    if check_corpus():
+        return 1
+    if args.check_only:
+        return 0
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        content = build_metadata("engdb.glo", size)
+        row = {"versions": size, "bytes": len(content)}
+        for name, parse in (
+            ("bs4_us", soup_release),
+            ("lxml_release_us", parse_release),
+            ("lxml_metadata_us", parse_metadata),
+        ):
+            row[name] = round(measure(parse, content, args.iterations), 2)
+        row["speedup"] = round(row["bs4_us"] / row["lxml_release_us"], 1)
+        results.append(row)
+        print(
+            f"{size:>5} версий {row['bytes']:>7} Б  bs4={row['bs4_us']:>9.2f}  release={row['lxml_release_us']:>8.2f}  "
+            f"metadata={row['lxml_metadata_us']:>8.2f} мкс  x{row['speedup']}",
+            file=sys.stderr,
+        )
+
+    text = json.dumps({"iterations": args.iterations, "results": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Замер холодного старта бота в отдельных процессах: импорт модулей, готовность (post_init),
+# первый ответ на /start и завершение фонового прогрева. Время считается от запуска процесса.
+#   python bench/bench_startup.py                          # 5 запусков, проверка бюджета
+#   python bench/bench_startup.py --budget-import 0.4      # код возврата 1, если медиана выше бюджета
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PHASES = ("import", "ready", "first_response", "warm_up")
+
+
+async def wait_phase(phase: str) -> None:
+    import startup
+    while phase not in startup.phases:
+        await asyncio.sleep(0.001)
+
+
+async def child_lifecycle() -> dict[str, float]:
+    import main
+    import startup
+    from fakes import FakeContext, FakeUpdate
+
+    application = main.build_application()
+    await main.post_init(application)
+    await main.start(FakeUpdate("/start"), FakeContext())
+    try:
+        await asyncio.wait_for(wait_phase("warm_up"), timeout=30)
+    finally:
+        await main.post_stop(application)
+        await main.post_shutdown(application)
+    return dict(startup.phases)
+
+
+def run_child(data_dir: str) -> None:
+    # Логи бота не должны попадать в bot.log при прогоне бенчмарка
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    sys.path.insert(0, os.path.join(ROOT, "bot"))
+    sys.path.insert(0, BENCH_DIR)
+
+    # Файлы бота — во временный каталог; модули читают пути из config при импорте, поэтому до импорта main
+    import config
+    for name in ("RELEASES_JSON_PATH", "RELEASES_HISTORY_PATH", "RELEASES_DB_PATH", "SUBSCRIPTIONS_JSON_PATH",
+                 "PERSISTENCE_DB_PATH", "SNAPSHOT_PATH"):
+        setattr(config, name, os.path.join(data_dir, os.path.basename(getattr(config, name))))
+
+    print(json.dumps(asyncio.run(child_lifecycle())))
+
+
+def run_once() -> dict[str, float]:
+    env = dict(
+        os.environ,
+        TELEGRAM_TOKEN="0:bench",
+        # Фоновое обновление снимка не должно уходить в сеть: порт 9 закрыт
+        URL="http://127.0.0.1:9/",
+        MAVEN_RELEASES_URL="http://127.0.0.1:9/releases",
+        SNAPSHOT_REFRESH_INTERVAL="3600",
+        METRICS_PORT="0",
+        API_PORT="0",
+    )
+    with tempfile.TemporaryDirectory() as data_dir:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", data_dir],
+            env=env, cwd=data_dir, capture_output=True, text=True,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Запуск завершился с кодом {completed.returncode}:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Замер холодного старта бота с бюджетом времени")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-import", type=float, default=0.6, help="бюджет на импорт модулей, сек")
+    parser.add_argument("--budget-first-response", type=float, default=1.0, help="бюджет до первого ответа, сек")
+    parser.add_argument("--output", help="куда записать JSON (по умолчанию stdout)")
+    parser.add_argument("--child", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return 0
+
+    runs = [run_once() for _ in range(args.runs)]
+    results = {}
+    for phase in PHASES:
+        values = sorted(run[phase] for run in runs if phase in run)
+        if values:
+            results[phase] = {
+                "median_s": round(statistics.median(values), 4),
+                "min_s": round(values[0], 4),
+                "max_s": round(values[-1], 4),
+            }
+    budgets = {"import": args.budget_import, "first_response": args.budget_first_response}
+
+    text = json.dumps({"runs": args.runs, "budgets_s": budgets, "results": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = False
+    for phase, result in results.items():
+        budget = budgets.get(phase)
+        over = budget is not None and result["median_s"] > budget
+        failed = failed or over
+        print(
+            f"{phase:<16} медиана={result['median_s'] * 1000:>8.1f} мин={result['min_s'] * 1000:>8.1f} "
+            f"макс={result['max_s'] * 1000:>8.1f} мс"
+            + (f"  бюджет {budget * 1000:.0f} мс" + ("  ПРЕВЫШЕН" if over else "") if budget is not None else ""),
+            file=sys.stderr,
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import asyncio
+
+from telegram import ReplyKeyboardMarkup
+from telegram.error import BadRequest
+
+# Минимальные заменители Update/Context для вызова обработчиков без Telegram
+
+
+class FakeUser:
+    def __init__(self, user_id: int = 1):
+        self.id = user_id
+        self.username = f"bench{user_id}"
+        self.full_name = f"Bench User {user_id}"
+
+
+class FakeMessage:
+    def __init__(self, text: str = "", chat_id: int = 1, message_id: int = 1, reply_markup=None):
+        self.text = text
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.reply_markup = reply_markup
+        self.replies: list[str] = []
+
+    async def reply_text(self, text: str, reply_markup=None, **kwargs) -> "FakeMessage":
+        self.replies.append(text)
+        reply = FakeMessage(text, self.chat_id, self.message_id + len(self.replies), reply_markup)
+        reply.replies = self.replies
+        return reply
+
+    async def edit_text(self, text: str, **kwargs) -> "FakeMessage":
+        # Как в Telegram: сообщение с клавиатурой под полем ввода не редактируется
+        if isinstance(self.reply_markup, ReplyKeyboardMarkup):
+            raise BadRequest("Message can't be edited")
+        self.replies.append(text)
+        return self
+
+    async def delete(self) -> bool:
+        return True
+
+
+class FakeUpdate:
+    def __init__(self, text: str = "", user_id: int = 1):
+        self.message = FakeMessage(text, chat_id=user_id)
+        self.effective_user = FakeUser(user_id)
+        self.effective_chat = FakeUser(user_id)
+        self.effective_message = self.message
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> FakeMessage:
+        self.sent.append((chat_id, text))
+        return FakeMessage(text, chat_id)
+
+    async def edit_message_text(self, text: str, chat_id: int, message_id: int, **kwargs) -> FakeMessage:
+        self.sent.append((chat_id, text))
+        return FakeMessage(text, chat_id, message_id)
+
+
+class FakeApplication:
+    # Фоновые задачи обработчиков собираются, чтобы замер мог дождаться ответа пользователю
+    def __init__(self):
+        self.tasks: list[asyncio.Task] = []
+
+    def create_task(self, coroutine, update=None, name: str | None = None) -> asyncio.Task:
+        task = asyncio.create_task(coroutine, name=name)
+        self.tasks.append(task)
+        return task
+
+    async def wait_tasks(self) -> None:
+        while self.tasks:
+            await self.tasks.pop()
+
+
+class FakeContext:
+    def __init__(self, **user_data):
+        self.user_data = dict(user_data)
+        self.chat_data = {}
+        self.bot_data = {}
+        self.bot = FakeBot()
+        self.application = FakeApplication()
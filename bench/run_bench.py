@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Офлайн-бенчмарк горячих путей бота против локальной замены индекса и Maven.
+#   python bench/run_bench.py --latency 50 --jitter 20 --output bench_output.txt
+#   python bench/run_bench.py --compare old.json   # сравнение с прошлым прогоном
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "bot"))
+
+from fakes import FakeContext, FakeUpdate  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+async def measure(name: str, call, iterations: int, concurrency: int, setup=None) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(iterations)))
+    wall = time.perf_counter() - wall_started
+
+    latencies.sort()
+    return {
+        "name": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "throughput_rps": round(iterations / wall, 2) if wall else 0.0,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenarios(args) -> list[dict]:
+    import config
+    import http_client
+    import main
+    import snapshot
+    import upstream
+
+    pom_url = config.UNIFIED_POM_URLS["glo"]
+    product = config.PRODUCT_BUTTONS[args.project][args.build_type]
+    n, c = args.iterations, args.concurrency
+
+    # Ответ пользователю готовится фоновой задачей, замер идёт до её завершения;
+    # у каждого вызова свой пользователь, чтобы не упираться в лимит запросов на пользователя
+    users = itertools.count(1)
+
+    async def send_version() -> None:
+        context = FakeContext(project=args.project)
+        await main.send_version(FakeUpdate(args.build_type, next(users)), context, args.build_type)
+        await context.application.wait_tasks()
+
+    async def send_pom_version() -> None:
+        context = FakeContext(project=args.project)
+        await main.send_pom_version(FakeUpdate("Новейший релиз", next(users)), context, "Новейший релиз")
+        await context.application.wait_tasks()
+
+    clear_cache = upstream.metadata_cache.clear
+    results = [
+        await measure("parse_index", lambda: upstream.parse_index(config.URL), n, c),
+        await measure("parse_index[product]", lambda: upstream.parse_index(config.URL, product), n, c),
+        await measure("parse_pom_version[cold]", lambda: upstream.parse_pom_version(pom_url), n, c, clear_cache),
+        await measure("parse_pom_version[cached]", lambda: upstream.parse_pom_version(pom_url), n, c),
+        await measure("send_version[on_demand]", send_version, n, c),
+        await measure("send_pom_version[cold]", send_pom_version, n, c, clear_cache),
+    ]
+
+    # Дальше — с прогретым фоновым снимком, как в работающем боте: сначала со сборкой ответа
+    # на каждый запрос, затем с готовыми телами ответов из кэша
+    await snapshot.refresh_snapshot()
+    clear_rendered = main.rendered_bodies.clear
+    results += [
+        await measure("send_version[snapshot]", send_version, n, c, clear_rendered),
+        await measure("send_pom_version[snapshot]", send_pom_version, n, c, clear_rendered),
+        await measure("send_version[rendered]", send_version, n, c),
+        await measure("send_pom_version[rendered]", send_pom_version, n, c),
+    ]
+    await http_client.close_client()
+    return results
+
+
+def compare(current: dict, baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline_report = json.load(f)
+    if baseline_report.get("params") != current["params"]:
+        print("Внимание: параметры прогонов различаются, сравнение может быть некорректным", file=sys.stderr)
+    baseline = {r["name"]: r for r in baseline_report["results"]}
+
+    regressions = 0
+    for result in current["results"]:
+        old = baseline.get(result["name"])
+        if old is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if old[metric] and result[metric] > old[metric] * (1 + threshold):
+                regressions += 1
+                print(
+                    f"РЕГРЕССИЯ {result['name']} {metric}: {old[metric]} -> {result[metric]} мс",
+                    file=sys.stderr,
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк parse_index/parse_pom_version/send_*")
+    parser.add_argument("--versions", type=int, default=200, help="ссылок .tar.gz на каждый продукт в индексе")
+    parser.add_argument("--metadata-versions", type=int, default=50, help="<version> в maven-metadata.xml")
+    parser.add_argument("--latency", type=float, default=20.0, help="задержка ответа сервера, мс")
+    parser.add_argument("--jitter", type=float, default=10.0, help="случайная добавка к задержке, мс")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--project", default="PRV")
+    parser.add_argument("--build-type", default="DEV")
+    parser.add_argument("--output", help="куда записать JSON (по умолчанию stdout)")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост перцентилей, доля")
+    args = parser.parse_args()
+
+    # Логи бота не должны попадать в bot.log при прогоне бенчмарка
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+
+    os.environ.setdefault("TELEGRAM_TOKEN", "0:bench")
+    os.environ["SNAPSHOT_REFRESH_INTERVAL"] = "3600"
+    import config
+
+    products = sorted({
+        product
+        for builds in config.PRODUCT_BUTTONS.values()
+        for build_type, product in builds.items()
+        if build_type != "POM" and product != "версия отсутствует"
+    })
+    server = StubServer(
+        products, args.versions, args.metadata_versions, args.latency / 1000, args.jitter / 1000
+    ).start()
+    # Модули бота читают адреса из config при импорте, поэтому подменяем их до импорта
+    config.URL = server.index_url
+    for module, url in config.UNIFIED_POM_URLS.items():
+        config.UNIFIED_POM_URLS[module] = url.replace(config.MAVEN_RELEASES_URL, server.maven_url)
+    # Файлы бота — во временный каталог, чтобы прогон не трогал releases.db и остальные данные в корне
+    data_dir = tempfile.TemporaryDirectory()
+    for name in ("RELEASES_JSON_PATH", "RELEASES_HISTORY_PATH", "RELEASES_DB_PATH", "SUBSCRIPTIONS_JSON_PATH",
+                 "PERSISTENCE_DB_PATH", "SNAPSHOT_PATH"):
+        setattr(config, name, os.path.join(data_dir.name, os.path.basename(getattr(config, name))))
+
+    try:
+        results = asyncio.run(run_scenarios(args))
+    finally:
+        server.stop()
+        data_dir.cleanup()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": {
+            key: value for key, value in vars(args).items() if key not in ("output", "compare", "threshold")
+        },
+        "upstream_requests": server.requests,
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for result in results:
+        print(
+            f"{result['name']:<28} p50={result['p50_ms']:>9.2f} p95={result['p95_ms']:>9.2f} "
+            f"p99={result['p99_ms']:>9.2f} мс  {result['throughput_rps']:>9.2f} оп/с",
+            file=sys.stderr,
+        )
+
+    if args.compare:
+        return 1 if compare(report, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Локальная замена индекса дистрибутивов и Maven-репозитория для бенчмарков.
+# Индекс: GET /index/ — <ul> со ссылками <product>-<version>.tar.gz.
+# Maven: GET .../<artifact>/maven-metadata.xml — метаданные с <release>, <latest> и <versions>.
+
+INDEX_PATH = "/index/"
+MAVEN_PREFIX = "/#/releases/ru/cs"
+
+
+def build_index(products: list[str], versions_per_product: int) -> bytes:
+    lines = ["<html><head><title>Index of /</title></head><body><h1>Index of /</h1><ul>"]
+    for product in products:
+        for i in range(versions_per_product):
+            name = f"{product}-1.{i // 100}.{i % 100}.tar.gz"
+            lines.append(f'<li><a href="{name}">{name}</a></li>')
+    lines.append("</ul></body></html>")
+    return "\n".join(lines).encode()
+
+
+def build_metadata(artifact: str, versions: int) -> bytes:
+    all_versions = [f"2.{i // 10}.{i % 10}" for i in range(versions)]
+    body = "".join(f"<version>{version}</version>" for version in all_versions)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f"<metadata><groupId>ru.cs</groupId><artifactId>{artifact}</artifactId><versioning>"
+        f"<latest>{all_versions[-1]}</latest><release>{all_versions[-1]}</release>"
+        f"<versions>{body}</versions><lastUpdated>20250101120000</lastUpdated>"
+        "</versioning></metadata>"
+    ).encode()
+
+
+class _Server(ThreadingHTTPServer):
+    # Очередь accept по умолчанию (5) теряет SYN при параллельных подключениях и даёт выбросы в 1 с
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubServer:
+    def __init__(self, products: list[str], versions_per_product: int = 200, metadata_versions: int = 50,
+                 latency: float = 0.0, jitter: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._index = build_index(products, versions_per_product)
+        self._metadata_versions = metadata_versions
+        self._metadata: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), self._make_handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def index_url(self) -> str:
+        return self.base_url + INDEX_PATH
+
+    @property
+    def maven_url(self) -> str:
+        return self.base_url + MAVEN_PREFIX
+
+    def _metadata_for(self, artifact: str) -> bytes:
+        with self._lock:
+            if artifact not in self._metadata:
+                self._metadata[artifact] = build_metadata(artifact, self._metadata_versions)
+            return self._metadata[artifact]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                delay = server.latency + random.uniform(0, server.jitter)
+                if delay > 0:
+                    time.sleep(delay)
+
+                if self.path == INDEX_PATH:
+                    body, content_type = server._index, "text/html; charset=utf-8"
+                elif self.path.endswith("/maven-metadata.xml"):
+                    artifact = self.path.rstrip("/").split("/")[-2]
+                    body, content_type = server._metadata_for(artifact), "application/xml"
+                else:
+                    body, content_type = b"Not Found", "text/plain"
+                    self.send_response(404)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,131 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Hashable
+
+from config import REQUEST_CONCURRENCY, REQUEST_QUEUE_SIZE
+from metrics import ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_REJECTED, registry
+
+
+class AdmissionError(Exception):
+    pass
+
+
+class UserBusyError(AdmissionError):
+    pass
+
+
+class QueueFullError(AdmissionError):
+    pass
+
+
+class AdmissionController:
+    # Не больше concurrency тяжёлых запросов одновременно, остальные ждут в очереди FIFO
+    # длиной до queue_size; у одного пользователя — не больше одного запроса в работе или в очереди
+    def __init__(self, concurrency: int, queue_size: int):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._users: set[Hashable] = set()
+        # Выданные, но ещё не вставшие в очередь допуски: фоновая задача запускается не сразу
+        self._reserved = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters) + self._reserved
+
+    def _release(self) -> None:
+        # Освободившийся слот передаём первому живому ожидающему, не уменьшая счётчик
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    async def _acquire(self, on_queued: Callable[[int], Awaitable[None]] | None) -> None:
+        if self._active < self.concurrency and not self._waiters:
+            self._active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            if on_queued is not None:
+                await on_queued(len(self._waiters))
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже передан нам, но дождаться его не успели — отдаём следующему
+                self._release()
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            raise
+
+    def admit(self, user_id: Hashable, on_queued: Callable[[int], Awaitable[None]] | None = None,
+              bypass_queue: bool = False) -> "Admission":
+        # Проверки — сразу при вызове, чтобы обработчик мог ответить отказом до запуска фоновой задачи;
+        # ожидание слота — в async with.
+        # bypass_queue — запрос не создаёт нагрузки (например, присоединяется к уже идущему),
+        # поэтому общий лимит к нему не применяется, а ограничение на пользователя — применяется
+        if user_id in self._users:
+            ADMISSION_REJECTED.inc(reason="user_busy")
+            raise UserBusyError("Предыдущий запрос ещё выполняется")
+        if not bypass_queue and self._active + self.queued >= self.concurrency + self.queue_size:
+            ADMISSION_REJECTED.inc(reason="queue_full")
+            raise QueueFullError("Очередь запросов заполнена")
+        self._users.add(user_id)
+        if not bypass_queue:
+            self._reserved += 1
+        return Admission(self, user_id, on_queued, bypass_queue)
+
+
+class Admission:
+    def __init__(self, controller: AdmissionController, user_id: Hashable,
+                 on_queued: Callable[[int], Awaitable[None]] | None, bypass_queue: bool):
+        self._controller = controller
+        self._user_id = user_id
+        self._on_queued = on_queued
+        self._bypass_queue = bypass_queue
+        self._holds_slot = False
+
+    async def __aenter__(self) -> None:
+        if self._bypass_queue:
+            return
+        self._controller._reserved -= 1
+        try:
+            await self._controller._acquire(self._on_queued)
+        except BaseException:
+            self._controller._users.discard(self._user_id)
+            raise
+        self._holds_slot = True
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._holds_slot:
+            self._controller._release()
+            self._holds_slot = False
+        self._controller._users.discard(self._user_id)
+
+
+_controller: AdmissionController | None = None
+
+
+def get_admission() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(REQUEST_CONCURRENCY, REQUEST_QUEUE_SIZE)
+    return _controller
+
+
+def _collect_admission_metrics() -> None:
+    if _controller is not None:
+        ADMISSION_ACTIVE.set(_controller.active)
+        ADMISSION_QUEUED.set(_controller.queued)
+
+
+registry.add_collector(_collect_admission_metrics)
@@ -0,0 +1,72 @@
+import json
+
+from config import POM_MODULES
+from http_server import HttpServer, Request, Response
+from plan import UnknownProjectError
+from resolver import (
+    VERSION_TYPE_BY_CODE,
+    PomResolution,
+    format_build_xml,
+    format_local_xml,
+    resolution_to_dict,
+    resolve_poms,
+)
+
+# HTTP API для CI: те же версии, что и в боте, но JSON или готовый XML без разметки Telegram
+#   GET /projects
+#   GET /pom?project=PRV&project=TMIK&type=latest|install|test&format=json|xml
+
+FORMATS = ("json", "xml")
+
+
+def _json(status: int, data) -> Response:
+    return Response(status, json.dumps(data, ensure_ascii=False).encode(), "application/json; charset=utf-8")
+
+
+def render_xml(resolutions: list[PomResolution]) -> str:
+    # Как в ответе бота: по каждому проекту свойства локального pom и блок <properties> сборки,
+    # каждая часть подписана комментарием
+    return "".join(
+        f"<!-- {r.project}: локальный pom -->\n{format_local_xml(r)}\n"
+        f"<!-- {r.project}: сборка -->\n{format_build_xml(r)}\n"
+        for r in resolutions
+    )
+
+
+def render_json(resolutions: list[PomResolution]):
+    items = [resolution_to_dict(r) for r in resolutions]
+    return items[0] if len(items) == 1 else items
+
+
+def build_api_server(host: str, port: int) -> HttpServer:
+    server = HttpServer(host, port)
+
+    async def handle_projects(request: Request) -> Response:
+        return _json(200, {
+            "projects": [project for project, modules in POM_MODULES.items() if modules],
+            "types": list(VERSION_TYPE_BY_CODE),
+        })
+
+    async def handle_pom(request: Request) -> Response:
+        projects = [p for value in request.query.get("project", []) for p in value.split(",") if p]
+        version_code = request.query.get("type", ["latest"])[0]
+        output_format = request.query.get("format", ["json"])[0]
+        if not projects:
+            return _json(400, {"error": "Не указан project"})
+        if version_code not in VERSION_TYPE_BY_CODE:
+            return _json(400, {"error": f"Неизвестный type: {version_code}"})
+        if output_format not in FORMATS:
+            return _json(400, {"error": f"Неизвестный format: {output_format}"})
+
+        try:
+            resolutions = await resolve_poms(projects, VERSION_TYPE_BY_CODE[version_code])
+        except UnknownProjectError as e:
+            return _json(404, {"error": str(e)})
+
+        if output_format == "xml":
+            return Response(200, render_xml(resolutions).encode(), "application/xml; charset=utf-8")
+        return _json(200, render_json(resolutions))
+
+    server.route("GET", "/projects", handle_projects)
+    server.route("GET", "/pom", handle_pom)
+    return server
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from telegram.error import BadRequest, ChatMigrated, Forbidden, NetworkError, RetryAfter, TelegramError
+
+from config import (
+    BROADCAST_RATE,
+    BROADCAST_CHAT_INTERVAL,
+    BROADCAST_CONCURRENCY,
+    BROADCAST_MAX_RETRIES,
+)
+from subscriptions import get_subscriptions
+from telegram_errors import retry_after_seconds
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class BroadcastResult:
+    delivered: int = 0
+    failed: int = 0
+    pruned: list[int] = field(default_factory=list)
+
+
+DELIVERED, FAILED, PRUNED = "delivered", "failed", "pruned"
+
+
+class Broadcaster:
+    # Рассылка в фоне: общий лимит Telegram, лимит на чат, повторы и чистка мёртвых чатов
+    def __init__(self, rate: float, chat_interval: float, concurrency: int, max_retries: int):
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self._bucket = TokenBucket(rate, rate)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._chat_next: dict[int, float] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def broadcast(self, bot, chat_ids: Iterable[int], text: str) -> asyncio.Task:
+        task = asyncio.create_task(self._run(bot, list(chat_ids), text))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, bot, chat_ids: list[int], text: str) -> BroadcastResult:
+        outcomes = await asyncio.gather(*(self._send(bot, chat_id, text) for chat_id in chat_ids))
+        result = BroadcastResult()
+        for chat_id, outcome in zip(chat_ids, outcomes):
+            if outcome == DELIVERED:
+                result.delivered += 1
+            else:
+                result.failed += 1
+            if outcome == PRUNED:
+                result.pruned.append(chat_id)
+                get_subscriptions().remove(chat_id)
+        logging.info(
+            f"Рассылка завершена: доставлено {result.delivered}, ошибок {result.failed}, "
+            f"удалено подписчиков {len(result.pruned)}"
+        )
+        return result
+
+    async def _wait_chat(self, chat_id: int) -> None:
+        now = time.monotonic()
+        allowed_at = max(now, self._chat_next.get(chat_id, 0.0))
+        self._chat_next[chat_id] = allowed_at + self.chat_interval
+        if allowed_at > now:
+            await asyncio.sleep(allowed_at - now)
+
+    async def _send(self, bot, chat_id: int, text: str) -> str:
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._wait_chat(chat_id)
+                await self._bucket.acquire()
+                try:
+                    await bot.send_message(chat_id=chat_id, text=text)
+                    return DELIVERED
+                except RetryAfter as e:
+                    retry_after = retry_after_seconds(e)
+                    logging.warning(f"Flood control для {chat_id}, ждём {retry_after} сек")
+                    await asyncio.sleep(retry_after)
+                except Forbidden as e:
+                    logging.info(f"Чат {chat_id} недоступен ({e}), удаляем из подписчиков")
+                    return PRUNED
+                except (BadRequest, ChatMigrated) as e:
+                    if "chat not found" in str(e).lower():
+                        logging.info(f"Чат {chat_id} не найден, удаляем из подписчиков")
+                        return PRUNED
+                    logging.error(f"Ошибка отправки в {chat_id}: {e}")
+                    return FAILED
+                except NetworkError as e:
+                    delay = 2 ** attempt + random.uniform(0, 1)
+                    logging.warning(f"Сетевая ошибка при отправке в {chat_id}: {e}, повтор через {delay:.1f} сек")
+                    await asyncio.sleep(delay)
+                except TelegramError as e:
+                    # InvalidToken, Conflict и прочее: повтор не поможет, но остальная рассылка продолжается
+                    logging.error(f"Ошибка отправки в {chat_id}: {e}")
+                    return FAILED
+                except Exception:
+                    logging.exception(f"Непредвиденная ошибка отправки в {chat_id}")
+                    return FAILED
+            logging.error(f"Не удалось доставить сообщение в {chat_id} после {self.max_retries} повторов")
+            return FAILED
+
+    async def wait_closed(self, timeout: float) -> None:
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+
+
+_broadcaster: Broadcaster | None = None
+
+
+def get_broadcaster() -> Broadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = Broadcaster(
+            BROADCAST_RATE, BROADCAST_CHAT_INTERVAL, BROADCAST_CONCURRENCY, BROADCAST_MAX_RETRIES
+        )
+    return _broadcaster
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+
+@dataclass
+class CacheEntry:
+    value: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+
+class MetadataCache:
+    # LRU-кэш с TTL: просроченная запись не удаляется, а используется для условного запроса
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def get(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.monotonic() - entry.fetched_at < self.ttl
+
+    def validators(self, entry: CacheEntry | None) -> dict[str, str]:
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def put(self, key: str, value: str, etag: str | None = None, last_modified: str | None = None) -> None:
+        self._entries[key] = CacheEntry(value, etag, last_modified, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def refresh(self, key: str) -> None:
+        entry = self._entries[key]
+        entry.fetched_at = time.monotonic()
+        self.revalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+        }
+
+
+class StampedCache:
+    # Значение действительно, пока не изменился штамп версии данных, из которых оно получено
+    def __init__(self):
+        self._entries: dict[Hashable, tuple[Hashable, object]] = {}
+
+    def get(self, key: Hashable, stamp: Hashable) -> object | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != stamp:
+            return None
+        return entry[1]
+
+    def put(self, key: Hashable, stamp: Hashable, value: object) -> None:
+        self._entries[key] = (stamp, value)
+
+    def clear(self) -> None:
+        self._entries.clear()
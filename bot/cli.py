@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+
+# Версии POM для CI без Telegram:
+#   python bot/cli.py pom PRV TMIK --type latest --format xml
+#   python bot/cli.py pom --all --format json --strict
+#   python bot/cli.py serve --port 8080      # HTTP API из api.py
+
+from api import FORMATS, build_api_server, render_json, render_xml
+from config import API_LISTEN, API_PORT, POM_MODULES, SNAPSHOT_REFRESH_INTERVAL
+from http_client import close_client
+from plan import UnknownProjectError, get_plans
+from resolver import VERSION_TYPE_BY_CODE, resolve_poms
+from snapshot import load_snapshot, run_refresher
+
+
+async def run_pom(args) -> int:
+    projects = [project for project, modules in POM_MODULES.items() if modules] if args.all else args.projects
+    if not projects:
+        print("Укажите проекты или --all", file=sys.stderr)
+        return 2
+    try:
+        resolutions = await resolve_poms(projects, VERSION_TYPE_BY_CODE[args.type])
+    except UnknownProjectError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        await close_client()
+
+    if args.format == "xml":
+        sys.stdout.write(render_xml(resolutions))
+    else:
+        print(json.dumps(render_json(resolutions), ensure_ascii=False, indent=2))
+
+    unresolved = [(r.project, name) for r in resolutions for name in r.unresolved]
+    for project, name in unresolved:
+        print(f"{project}: не удалось получить {name}", file=sys.stderr)
+    return 1 if args.strict and unresolved else 0
+
+
+async def run_serve(args) -> int:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    # Как и бот, отвечаем из фонового снимка, чтобы запросы CI не ждали Maven
+    await asyncio.to_thread(load_snapshot)
+    refresher = asyncio.create_task(run_refresher(SNAPSHOT_REFRESH_INTERVAL))
+    server = build_api_server(args.host, args.port)
+    await server.start()
+    try:
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        refresher.cancel()
+        await asyncio.gather(refresher, return_exceptions=True)
+        await close_client()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Версии POM без Telegram")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pom = commands.add_parser("pom", help="вывести <properties> для проектов")
+    pom.add_argument("projects", nargs="*", help="проекты, например PRV TMIK")
+    pom.add_argument("--all", action="store_true", help="все проекты с модулями POM")
+    pom.add_argument("--type", choices=list(VERSION_TYPE_BY_CODE), default="latest",
+                     help="latest — новейший релиз, install/test — допущено к установке/тестированию")
+    pom.add_argument("--format", choices=FORMATS, default="json")
+    pom.add_argument("--strict", action="store_true", help="код возврата 1, если какая-то версия не получена")
+
+    serve = commands.add_parser("serve", help="запустить HTTP API")
+    serve.add_argument("--host", default=API_LISTEN)
+    serve.add_argument("--port", type=int, default=API_PORT or 8080)
+
+    args = parser.parse_args()
+    get_plans()
+    logging.basicConfig(level=logging.INFO if args.command == "serve" else logging.WARNING, stream=sys.stderr,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.command == "serve":
+        return asyncio.run(run_serve(args))
+    return asyncio.run(run_pom(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
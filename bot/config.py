@@ -6,6 +6,61 @@ load_dotenv()
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 URL = os.getenv("URL")
 
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+# Публичный адрес (https://host[:port]), по которому Telegram достучится до WEBHOOK_PATH
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+# Обязателен в режиме webhook: Telegram присылает его в X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+# Сколько секунд Telegram кэширует ответы на inline-запросы
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "30"))
+
+# Тяжёлые запросы версий: сколько выполняется одновременно и сколько может ждать в очереди
+REQUEST_CONCURRENCY = int(os.getenv("REQUEST_CONCURRENCY", "4"))
+REQUEST_QUEUE_SIZE = int(os.getenv("REQUEST_QUEUE_SIZE", "20"))
+# Не чаще раза в столько секунд редактируем сообщение с промежуточным результатом POM
+PROGRESS_EDIT_INTERVAL = float(os.getenv("PROGRESS_EDIT_INTERVAL", "1"))
+
+# Метрики в формате Prometheus: GET http://METRICS_LISTEN:METRICS_PORT/metrics, порт 0 отключает
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+# HTTP API для CI: GET http://API_LISTEN:API_PORT/pom?project=PRV&type=latest&format=json|xml, порт 0 отключает
+API_LISTEN = os.getenv("API_LISTEN", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "0"))
+
+# Сколько maven-metadata.xml запрашивать одновременно
+POM_CONCURRENCY = int(os.getenv("POM_CONCURRENCY", "10"))
+# Общий HTTP-клиент: таймауты в секундах, повторы с джиттером и размер пула соединений
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+# Предел на всю попытку целиком, включая чтение тела: таймаут чтения ограничивает только паузу между кусками
+HTTP_REQUEST_TIMEOUT = float(os.getenv("HTTP_REQUEST_TIMEOUT", "30"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+# После стольких ошибок подряд хост считается недоступным на CIRCUIT_RESET_TIMEOUT секунд
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+# Кэш maven-metadata.xml: время жизни записи в секундах и максимальное число записей
+POM_CACHE_TTL = float(os.getenv("POM_CACHE_TTL", "300"))
+POM_CACHE_SIZE = int(os.getenv("POM_CACHE_SIZE", "256"))
+# Период фонового обновления снимка версий в секундах
+SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("SNAPSHOT_REFRESH_INTERVAL", "300"))
+# Как часто сохранять состояния диалогов пользователей, секунд (и всегда — при остановке)
+PERSISTENCE_FLUSH_INTERVAL = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL", "5"))
+# Через сколько секунд после изменения подписок они сбрасываются на диск
+SUBSCRIPTIONS_FLUSH_DELAY = float(os.getenv("SUBSCRIPTIONS_FLUSH_DELAY", "2"))
+# Рассылка подписчикам: сообщений в секунду всего (лимит Telegram ~30), интервал на один чат,
+# число одновременных отправок и повторов при сетевых ошибках
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_CHAT_INTERVAL = float(os.getenv("BROADCAST_CHAT_INTERVAL", "1"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+
 # config_data.py
 
 # Добавим список модулей и пути к JSON
@@ -16,7 +71,15 @@ MODULES_LIST = [
 ]
 
 RELEASES_JSON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "releases.json")
+# История релизов для хранилища json: одна запись на строку, только дописывается
+RELEASES_HISTORY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "releases_history.jsonl")
+RELEASES_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "releases.db")
+# Хранилище релизов: sqlite или json (старый формат releases.json)
+RELEASE_STORE_BACKEND = os.getenv("RELEASE_STORE", "sqlite")
 SUBSCRIPTIONS_JSON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "subscriptions.json")
+# Состояния диалогов и user_data: переживают рестарт, пишутся пачкой раз в PERSISTENCE_FLUSH_INTERVAL секунд
+PERSISTENCE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "state.db")
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "snapshot.json")
 
 PRODUCT_BUTTONS = {
     "PRV": {"DEV": "cs-eng-proryv-dev", "STAND": "cs-eng-proryv-dev-prv", "PROD": "cs-eng-proryv-proryv_prod",
@@ -43,6 +106,9 @@ POM_MODULES = {
     "PED": ["engbe", "glo", "dms", "dpd"],
 }
 
+# Модули локального pom, релизы которых через бота не регистрируются: версия всегда из Maven
+POM_UNTRACKED_MODULES = {"engbe"}
+
 POM_BUILD_MODULES = {
     "PRV": {
         "CORE": [
@@ -165,22 +231,25 @@ POM_BUILD_MODULES = {
     }
 }
 
+# Корень релизного репозитория Maven, для бенчмарков можно подменить локальным сервером
+MAVEN_RELEASES_URL = os.getenv("MAVEN_RELEASES_URL", "https://mvn.cstechnology.ru/#/releases/ru/cs")
+
 UNIFIED_POM_URLS = {
-    "engbe": "https://mvn.cstechnology.ru/#/releases/ru/cs/engbe",
-    "glo": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-glo",
-    "itg": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-itg",
-    "dms": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-dms",
-    "dpd": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-dpd",
-    "cm": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-cm",
-    "ped": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-ped",
-    "engrestapi": "https://mvn.cstechnology.ru/#/releases/ru/cs/engrestapi",
-    "cli": "https://mvn.cstechnology.ru/#/releases/ru/cs/engdbcli",
-    "conv": "https://mvn.cstechnology.ru/#/releases/ru/cs/engconv",
-    "front": "https://mvn.cstechnology.ru/#/releases/ru/cs/engfront",
-    "cfg": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-cfg",
-    "proryv": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-proryv",
-    "bdrk": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-bdrk",
-    "tmik": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-tmik",
-    "pm": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-pm",
-    "tyazhmash": "https://mvn.cstechnology.ru/#/releases/ru/cs/cs-tyazhmash",
+    "engbe": f"{MAVEN_RELEASES_URL}/engbe",
+    "glo": f"{MAVEN_RELEASES_URL}/cs-glo",
+    "itg": f"{MAVEN_RELEASES_URL}/cs-itg",
+    "dms": f"{MAVEN_RELEASES_URL}/cs-dms",
+    "dpd": f"{MAVEN_RELEASES_URL}/cs-dpd",
+    "cm": f"{MAVEN_RELEASES_URL}/cs-cm",
+    "ped": f"{MAVEN_RELEASES_URL}/cs-ped",
+    "engrestapi": f"{MAVEN_RELEASES_URL}/engrestapi",
+    "cli": f"{MAVEN_RELEASES_URL}/engdbcli",
+    "conv": f"{MAVEN_RELEASES_URL}/engconv",
+    "front": f"{MAVEN_RELEASES_URL}/engfront",
+    "cfg": f"{MAVEN_RELEASES_URL}/cs-cfg",
+    "proryv": f"{MAVEN_RELEASES_URL}/cs-proryv",
+    "bdrk": f"{MAVEN_RELEASES_URL}/cs-bdrk",
+    "tmik": f"{MAVEN_RELEASES_URL}/cs-tmik",
+    "pm": f"{MAVEN_RELEASES_URL}/cs-pm",
+    "tyazhmash": f"{MAVEN_RELEASES_URL}/cs-tyazhmash",
 }
@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+
+def atomic_write(path: str, text: str) -> None:
+    # Временный файл рядом с целевым, fsync и переименование: читатель видит либо старый, либо новый файл
+    directory = os.path.dirname(path) or "."
+    name = os.path.basename(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
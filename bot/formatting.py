@@ -0,0 +1,7 @@
+import re
+
+MD_ESCAPE_RE = re.compile(r'([_*\[\]()~`>#+\-=|{}.!])')
+
+
+def escape_md(text: str) -> str:
+    return MD_ESCAPE_RE.sub(r'\\\1', str(text))
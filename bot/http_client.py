@@ -0,0 +1,207 @@
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_REQUEST_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_BACKOFF,
+    HTTP_MAX_CONNECTIONS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+)
+from metrics import CIRCUIT_OPEN, registry
+
+# HTTP/2 включается, только если установлен пакет h2 (закреплён в requirements.txt)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class _DeadlineStream(httpx.AsyncByteStream):
+    # Тело потокового ответа читается вызывающим кодом уже после _with_retries:
+    # каждый кусок ждём не дольше, чем осталось до конца попытки
+    def __init__(self, stream: httpx.AsyncByteStream, deadline: float, url: str):
+        self._stream = stream
+        self._deadline = deadline
+        self._url = url
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        iterator = self._stream.__aiter__()
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), max(self._deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise httpx.ReadTimeout(f"Ответ {self._url} не получен за {HTTP_REQUEST_TIMEOUT} сек") from None
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+class CircuitBreaker:
+    # closed -> (N ошибок подряд) -> open -> (reset_timeout) -> half-open: одна пробная попытка
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.reset_timeout or self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        # Пробная попытка завершилась без вердикта (например, отменена): следующую можно пустить снова
+        self._probe_in_flight = False
+
+
+_client: httpx.AsyncClient | None = None
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    host = urlsplit(url).netloc
+    if host not in _breakers:
+        _breakers[host] = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+    return _breakers[host]
+
+
+def _collect_circuit_metrics() -> None:
+    for host, breaker in _breakers.items():
+        CIRCUIT_OPEN.set(1 if breaker.is_open else 0, host=host)
+
+
+registry.add_collector(_collect_circuit_metrics)
+
+
+def _backoff(attempt: int) -> float:
+    # Экспоненциальная задержка с полным джиттером
+    return random.uniform(0, HTTP_BACKOFF * 2 ** attempt)
+
+
+def _should_retry(response: httpx.Response) -> bool:
+    return response.status_code in RETRY_STATUSES or response.status_code >= 500
+
+
+async def _attempt(url: str, send) -> httpx.Response:
+    try:
+        return await asyncio.wait_for(send(), HTTP_REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise httpx.ReadTimeout(f"Ответ {url} не получен за {HTTP_REQUEST_TIMEOUT} сек") from None
+
+
+async def _with_retries(url: str, send):
+    # Худший случай ограничен: (HTTP_RETRIES + 1) попыток по HTTP_REQUEST_TIMEOUT плюс задержки между ними
+    breaker = get_breaker(url)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Хост {urlsplit(url).netloc} временно недоступен")
+
+    try:
+        for attempt in range(HTTP_RETRIES + 1):
+            last_attempt = attempt == HTTP_RETRIES
+            try:
+                response = await _attempt(url, send)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    breaker.record_failure()
+                    raise
+                logging.warning(f"Ошибка запроса {url}: {e!r}, повтор {attempt + 1}")
+            except Exception:
+                # Битое тело (DecodingError) и прочее повтором не лечится, но для хоста это тоже отказ
+                breaker.record_failure()
+                raise
+            else:
+                if not _should_retry(response) or last_attempt:
+                    if response.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    return response
+                logging.warning(f"{url} ответил {response.status_code}, повтор {attempt + 1}")
+                await response.aclose()
+            await asyncio.sleep(_backoff(attempt))
+    finally:
+        # Иначе после отмены пробной попытки хост остался бы закрытым до перезапуска
+        breaker.release_probe()
+
+
+async def get(url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+    return await _with_retries(url, lambda: get_client().get(url, headers=headers))
+
+
+@asynccontextmanager
+async def stream(url: str, headers: dict[str, str] | None = None) -> AsyncIterator[httpx.Response]:
+    client = get_client()
+    request = client.build_request("GET", url, headers=headers)
+
+    async def send() -> httpx.Response:
+        deadline = asyncio.get_running_loop().time() + HTTP_REQUEST_TIMEOUT
+        response = await client.send(request, stream=True)
+        response.stream = _DeadlineStream(response.stream, deadline, url)
+        return response
+
+    response = await _with_retries(url, send)
+    try:
+        yield response
+    except (httpx.TransportError, httpx.DecodingError):
+        get_breaker(url).record_failure()
+        raise
+    finally:
+        await response.aclose()
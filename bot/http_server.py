@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Awaitable, Callable
+from urllib.parse import parse_qs, urlsplit
+
+MAX_BODY_SIZE = 1024 * 1024
+READ_TIMEOUT = 30
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]
+    body: bytes = b""
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class HttpServer:
+    # Минимальный HTTP/1.1 сервер на asyncio для вебхука и служебных эндпоинтов
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._routes: dict[tuple[str, str], Handler] = {}
+        self._server: asyncio.base_events.Server | None = None
+
+    def route(self, method: str, path: str, handler: Handler) -> None:
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logging.info(f"HTTP сервер слушает {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[Request, bool] | None:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, target, version = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", "0"))
+        if length > MAX_BODY_SIZE:
+            raise ValueError("Слишком большое тело запроса")
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        return Request(method.upper(), url.path, parse_qs(url.query), headers, body), keep_alive
+
+    async def _dispatch(self, request: Request) -> Response:
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            allowed = any(path == request.path for _, path in self._routes)
+            status = HTTPStatus.METHOD_NOT_ALLOWED if allowed else HTTPStatus.NOT_FOUND
+            return Response(status, status.phrase.encode())
+        try:
+            return await handler(request)
+        except Exception as e:
+            logging.error(f"Ошибка обработки {request.method} {request.path}: {e}")
+            return Response(500, b"Internal Server Error")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    parsed = await asyncio.wait_for(self._read_request(reader), READ_TIMEOUT)
+                except (ValueError, asyncio.IncompleteReadError):
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                if parsed is None:
+                    break
+                request, keep_alive = parsed
+                response = await self._dispatch(request)
+
+                headers = {
+                    "Content-Type": response.content_type,
+                    "Content-Length": str(len(response.body)),
+                    "Connection": "keep-alive" if keep_alive else "close",
+                    **response.headers,
+                }
+                head = f"HTTP/1.1 {response.status} {HTTPStatus(response.status).phrase}\r\n"
+                head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+                writer.write(head.encode("latin-1") + b"\r\n" + response.body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -1,17 +1,24 @@
-import json
+import asyncio
 import os
 import re
-import requests
 import logging
 import time
-from bs4 import BeautifulSoup
-from packaging.version import Version
 from datetime import datetime, timedelta
-
-from telegram import Update, ReplyKeyboardMarkup, User
+from typing import Awaitable, Callable
+
+from telegram import (
+    Update,
+    ReplyKeyboardMarkup,
+    User,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+)
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
+    BasePersistence,
     CommandHandler,
+    InlineQueryHandler,
     MessageHandler,
     filters,
     ContextTypes,
@@ -21,14 +28,37 @@ from telegram.ext import (
 from config import (
     URL,
     TELEGRAM_TOKEN,
+    BOT_MODE,
+    INLINE_CACHE_TIME,
+    METRICS_LISTEN,
+    METRICS_PORT,
+    PROGRESS_EDIT_INTERVAL,
+    API_LISTEN,
+    API_PORT,
     PRODUCT_BUTTONS,
     POM_MODULES,
-    POM_BUILD_MODULES,
-    UNIFIED_POM_URLS,
     MODULES_LIST,
-    RELEASES_JSON_PATH,
-    SUBSCRIPTIONS_JSON_PATH,
+    SNAPSHOT_REFRESH_INTERVAL,
 )
+from admission import Admission, AdmissionError, UserBusyError, get_admission
+from broadcast import get_broadcaster
+from cache import StampedCache
+from formatting import escape_md
+from http_client import close_client
+from http_server import HttpServer
+from maven_metadata import warm_up as warm_up_parsers
+from metrics import CACHE_EVENTS, build_metrics_server, instrumented
+from persistence import create_persistence
+from plan import get_plans
+from release_store import get_release_store
+from progress import ProgressMessage
+from resolver import POM_VERSION_TYPES, RELEASE_FILTERS, PomProperty, PomResolution, resolve_pom
+from singleflight import SingleFlight
+from snapshot import Snapshot, get_snapshot, load_snapshot, run_refresher
+import startup
+from subscriptions import get_subscriptions
+from upstream import parse_index, resolve_pom_versions
+from watcher import diff_snapshots
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOG_FILE_PATH = os.path.join(BASE_DIR, "bot.log")
@@ -39,6 +69,7 @@ logging.basicConfig(
     level=logging.INFO,
     encoding="utf-8",
 )
+startup.mark("import")
 
 (
     MAIN_MENU,
@@ -49,7 +80,16 @@ logging.basicConfig(
     GET_PROJECT,
     GET_BUILD_TYPE,
     GET_VERSION_TYPE,
-) = range(8)
+    GET_HISTORY_DATE,
+) = range(9)
+
+HISTORY_BUTTON = "📅 На дату"
+HISTORY_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y")
+
+# Одинаковые одновременные запросы версий получают один общий результат
+rendered_results = SingleFlight()
+# Готовые тела ответов по (проект, сборка, тип версий), действительные до изменения данных (data_stamp)
+rendered_bodies = StampedCache()
 
 
 def get_user_info(user: User) -> str:
@@ -61,39 +101,8 @@ def get_user_info(user: User) -> str:
     return " ".join(parts) if parts else f"id{user.id}"
 
 
-def load_releases() -> list:
-    try:
-        with open(RELEASES_JSON_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
-
-
-def save_releases(data: list) -> None:
-    unique_entries = {}
-    for item in data:
-        key = (item["module"], item["version_type"])
-        unique_entries[key] = item
-    with open(RELEASES_JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(list(unique_entries.values()), f, ensure_ascii=False, indent=2)
-
-
-def load_subscriptions() -> dict:
-    try:
-        with open(SUBSCRIPTIONS_JSON_PATH, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"users": []}
-
-
-def save_subscriptions(data: dict) -> None:
-    with open(SUBSCRIPTIONS_JSON_PATH, "w") as f:
-        json.dump(data, f, indent=2)
-
-
 def build_main_menu(user_id: int) -> ReplyKeyboardMarkup:
-    subs = load_subscriptions()
-    sub_button = "Отписаться" if user_id in subs["users"] else "Подписаться"
+    sub_button = "Отписаться" if user_id in get_subscriptions() else "Подписаться"
     return ReplyKeyboardMarkup(
         [["Добавить релиз", "Получить"], [sub_button]],
         resize_keyboard=True
@@ -105,6 +114,7 @@ def build_keyboard(items: list, cols: int = 3) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(rows, resize_keyboard=True)
 
 
+@instrumented
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data.clear()
     await update.message.reply_text(
@@ -118,12 +128,14 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     return await start(update, context)
 
 
+@instrumented
 async def add_release_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     keyboard = build_keyboard_with_home(MODULES_LIST)
     await update.message.reply_text("Выберите модуль:", reply_markup=keyboard)
     return ADD_RELEASE_MODULE
 
 
+@instrumented
 async def add_release_module(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if update.message.text == "🏠 Домой":
         return await home(update, context)
@@ -141,6 +153,7 @@ async def add_release_module(update: Update, context: ContextTypes.DEFAULT_TYPE)
     return ADD_RELEASE_VERSION
 
 
+@instrumented
 async def add_release_version(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if update.message.text == "🏠 Домой":
         return await home(update, context)
@@ -160,6 +173,7 @@ async def add_release_version(update: Update, context: ContextTypes.DEFAULT_TYPE
     return ADD_RELEASE_DESCRIPTION
 
 
+@instrumented
 async def add_release_description(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if update.message.text == "🏠 Домой":
         return await home(update, context)
@@ -176,6 +190,7 @@ async def add_release_description(update: Update, context: ContextTypes.DEFAULT_
     return ADD_RELEASE_TYPE
 
 
+@instrumented
 async def add_release_type(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     version_type = update.message.text
     if version_type not in ["Допущен к установке", "Допущен к тестированию"]:
@@ -183,39 +198,17 @@ async def add_release_type(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         return ADD_RELEASE_TYPE
 
     normalized_type = version_type.split()[-1].lower()
-    releases = load_releases()
-    existing = next(
-        (item for item in releases
-         if item["module"] == context.user_data["module"]
-         and item["version_type"] == normalized_type),
-        None
-    )
-    if existing:
-        existing.update({
-            "version": context.user_data["version"],
-            "description": context.user_data.get("description", ""),
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "user": get_user_info(update.effective_user)
-        })
-    else:
-        releases.append({
-            "module": context.user_data["module"],
-            "version": context.user_data["version"],
-            "description": context.user_data.get("description", ""),
-            "version_type": normalized_type,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "user": get_user_info(update.effective_user)
-        })
-    notify = {
-            "module": context.user_data["module"],
-            "version": context.user_data["version"],
-            "description": context.user_data.get("description", ""),
-            "version_type": normalized_type,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "user": get_user_info(update.effective_user)
-        }
-    save_releases(releases)
-    await notify_subscribers(context.bot, notify)
+    release = {
+        "module": context.user_data["module"],
+        "version": context.user_data["version"],
+        "description": context.user_data.get("description", ""),
+        "version_type": normalized_type,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "user": get_user_info(update.effective_user)
+    }
+    # Запись одной строки, вне цикла событий
+    await asyncio.to_thread(get_release_store().upsert, release)
+    await notify_subscribers(context.bot, release)
 
     await update.message.reply_text(
         "✅ Релиз добавлен!",
@@ -225,13 +218,23 @@ async def add_release_type(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     return MAIN_MENU
 
 
+@instrumented
 async def skip_description(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data["description"] = ""
     return await add_release_description(update, context)
 
 
-async def notify_subscribers(bot, data: dict):
-    version_type = "к установке" if data["version_type"] == "установке" else "к тестированию"
+# Откуда релиз: отметка вручную (установке/тестированию) или наблюдатель (index/maven)
+RELEASE_TYPE_LABELS = {
+    "установке": "к установке",
+    "тестированию": "к тестированию",
+    "index": "в индексе дистрибутивов",
+    "maven": "в Maven",
+}
+
+
+async def notify_subscribers(bot, data: dict) -> asyncio.Task:
+    version_type = RELEASE_TYPE_LABELS.get(data["version_type"], "к тестированию")
     message = (
         f"🚀 Новый релиз {data['module']} v{data['version']} ({version_type})\n"
         f"📅 {data['timestamp']}\n👤 {data['user']}\n"
@@ -239,17 +242,24 @@ async def notify_subscribers(bot, data: dict):
     if data["description"] != "/skip":
         message += f"📝 {data['description']}"
 
-    subs = load_subscriptions()
-    for user_id in subs["users"]:
-        await bot.send_message(chat_id=user_id, text=message)
+    # Рассылка идёт в фоне, обработчик её не ждёт
+    return get_broadcaster().broadcast(bot, get_subscriptions().users(), message)
 
 
+async def notify_upstream_changes(bot, previous: Snapshot, current: Snapshot) -> None:
+    for release in diff_snapshots(previous, current):
+        logging.info(f"Новая версия {release['module']} {release['version']} ({release['version_type']})")
+        await notify_subscribers(bot, release)
+
+
+@instrumented
 async def get_version_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     keyboard = build_keyboard_with_home(list(PRODUCT_BUTTONS.keys()))
     await update.message.reply_text("Выберите проект:", reply_markup=keyboard)
     return GET_PROJECT
 
 
+@instrumented
 async def get_project(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if update.message.text == "🏠 Домой":
         return await home(update, context)
@@ -265,6 +275,7 @@ async def get_project(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
     return GET_BUILD_TYPE
 
 
+@instrumented
 async def home(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data.clear()
     await update.message.reply_text("🏠 Возвращаемся в главное меню")
@@ -277,6 +288,7 @@ def build_keyboard_with_home(items: list, cols: int = 3) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(rows, resize_keyboard=True)
 
 
+@instrumented
 async def get_build_type(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if update.message.text == "🏠 Домой":
         return await home(update, context)
@@ -293,7 +305,7 @@ async def get_build_type(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             [
                 ["🏠 Домой"],
                 ["Допущено к установке", "Допущено к тестированию"],
-                ["Новейший релиз"]
+                ["Новейший релиз", HISTORY_BUTTON]
             ],
             resize_keyboard=True
         )
@@ -304,66 +316,161 @@ async def get_build_type(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     return MAIN_MENU
 
 
+@instrumented
 async def get_version_type(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     version_type = update.message.text
-    if version_type not in ["Допущено к установке", "Допущено к тестированию", "Новейший релиз"]:
+    if version_type == HISTORY_BUTTON:
+        # История есть только у отметок "допущено", поэтому на дату — только эти типы
+        context.user_data["history"] = True
+        keyboard = ReplyKeyboardMarkup(
+            [["🏠 Домой"], list(RELEASE_FILTERS.keys())],
+            resize_keyboard=True
+        )
+        await update.message.reply_text("Выберите тип версий на дату:", reply_markup=keyboard)
+        return GET_VERSION_TYPE
+
+    allowed = RELEASE_FILTERS if context.user_data.get("history") else POM_VERSION_TYPES
+    if version_type not in allowed:
         await update.message.reply_text("Неверный тип. Выберите из списка.")
         return GET_VERSION_TYPE
 
+    if context.user_data.get("history"):
+        context.user_data["version_type"] = version_type
+        await update.message.reply_text(
+            "Введите дату по МСК в формате ГГГГ-ММ-ДД или ДД.ММ.ГГГГ:",
+            reply_markup=ReplyKeyboardMarkup([["🏠 Домой"]], resize_keyboard=True)
+        )
+        return GET_HISTORY_DATE
+
     await send_pom_version(update, context, version_type)
     return MAIN_MENU
 
 
-def parse_index(url: str) -> dict[str, list[Version]]:
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, "html.parser")
-    versions = {}
-    for link in soup.select("ul li a[href$='.tar.gz']"):
-        href = link.get('href')
-        match = re.match(r"^(.+)-(\d+(?:\.\d+)*)\.tar\.gz$", href)
-        if match:
-            name, ver = match.groups()
-            versions.setdefault(name, []).append(Version(ver))
-    return {name: sorted(vs) for name, vs in versions.items()}
+def parse_history_date(text: str) -> datetime | None:
+    # Конец указанного дня по МСК во времени сервера, в котором записаны отметки
+    for date_format in HISTORY_DATE_FORMATS:
+        try:
+            day = datetime.strptime(text.strip(), date_format)
+        except ValueError:
+            continue
+        return day + timedelta(days=1) - timedelta(hours=3, seconds=1)
+    return None
 
 
-def parse_pom_version(url: str) -> str:
-    xml_url = url.replace("#/", "").rstrip("/") + "/maven-metadata.xml"
-    try:
-        response = requests.get(xml_url)
-        soup = BeautifulSoup(response.text, "lxml-xml")
-        return soup.find("release").text.strip()
-    except Exception as e:
-        logging.error(f"Ошибка парсинга POM: {str(e)}")
-        return "Ошибка получения"
+@instrumented
+async def get_history_date(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    at = parse_history_date(update.message.text)
+    if at is None:
+        await update.message.reply_text("❌ Неверный формат даты! Попробуйте снова.")
+        return GET_HISTORY_DATE
 
+    await send_pom_version(update, context, context.user_data["version_type"], at)
+    return MAIN_MENU
 
-async def send_version(update: Update, context: ContextTypes.DEFAULT_TYPE, build_type: str):
-    project = context.user_data["project"]
-    combination = f"{project} {build_type}"
 
-    try:
-        parsed = parse_index(URL)
-        product = PRODUCT_BUTTONS[project][build_type]
+def data_stamp() -> tuple:
+    # Версия данных, из которых собираются ответы: меняется при записи релиза и при изменении снимка
+    snapshot = get_snapshot()
+    return get_release_store().generation, snapshot.generation if snapshot is not None else None
+
+
+def format_actual_at(actual_at: datetime, label: str = "актуально на") -> str:
+    now = (actual_at + timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
+    return f"\\({label} {escape_md(now)} по МСК\\)"
 
+
+def cached_body(key: tuple, stamp: tuple):
+    body = rendered_bodies.get(key, stamp)
+    CACHE_EVENTS.inc(cache="rendered", result="miss" if body is None else "hit")
+    return body
+
+
+async def render_version(project: str, build_type: str) -> str:
+    key = (project, build_type, None)
+    stamp = data_stamp()
+    snapshot = get_snapshot()
+    cached = cached_body(key, stamp)
+    if cached is None:
+        combination = f"{project} {build_type}"
+        product = PRODUCT_BUTTONS[project][build_type]
+        parsed = snapshot.index if snapshot is not None else await parse_index(URL, product)
         if product in parsed:
-            latest = parsed[product][-1]
-            timestamp = (datetime.now() + timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
-
-            safe_combination = re.sub(r'([_*\[\]()~`>#+\-=|{}.!])', r'\\\1', combination)
-            safe_product = re.sub(r'([_*\[\]()~`>#+\-=|{}.!])', r'\\\1', product)
-            safe_latest = re.sub(r'([_*\[\]()~`>#+\-=|{}.!])', r'\\\1', str(latest))
-            safe_timestamp = re.sub(r'([_*\[\]()~`>#+\-=|{}.!])', r'\\\1', timestamp)
-
-            message = (
-                rf"*Комбинация:* {safe_combination}"
-                rf"```\projectDistr=\"{safe_product}-{safe_latest}\"```"
-                rf"\(актуально на {safe_timestamp} по МСК\)"
+            body = (
+                rf"*Комбинация:* {escape_md(combination)}"
+                rf"```\projectDistr=\"{escape_md(product)}-{escape_md(parsed[product])}\"```"
             )
+            cached = (body, True)
         else:
-            safe_combination = re.sub(r'([_*\[\]()~`>#+\-=|{}.!])', r'\\\1', combination)
-            message = rf"*Комбинация:* {safe_combination}\nВерсия не найдена"
+            cached = (rf"*Комбинация:* {escape_md(combination)}\nВерсия не найдена", False)
+        # Ответ по живому индексу (снимка ещё нет) не кэшируем: его версия данных неизвестна
+        if snapshot is not None:
+            rendered_bodies.put(key, stamp, cached)
+
+    body, found = cached
+    if not found:
+        return body
+    return body + format_actual_at(snapshot.taken_at if snapshot is not None else datetime.now())
+
+
+async def render_combination(project: str, build_type: str, version_type: str | None,
+                             on_progress: Callable[[str], None] | None = None,
+                             at: datetime | None = None) -> str:
+    # on_progress получает промежуточные сообщения только тот, кто запустил вычисление;
+    # присоединившиеся к уже идущему запросу ждут сразу итог.
+    # Запрос на дату — один поиск по индексу истории, объединять такие запросы незачем
+    if at is not None:
+        return await render_pom_version(project, version_type, at=at)
+    if version_type is None:
+        return await rendered_results.do(
+            (project, build_type, None), lambda: render_version(project, build_type)
+        )
+    return await rendered_results.do(
+        (project, "POM", version_type), lambda: render_pom_version(project, version_type, on_progress)
+    )
+
 
+def admit_request(update: Update, key: tuple):
+    # Запросы без сетевой нагрузки (ответ из снимка или хранилища релизов, присоединение к такому же
+    # идущему запросу)
+    # очередь не занимают, но второй одновременный запрос пользователя всё равно отклоняется
+    cheap = (
+        rendered_results.in_flight(key)
+        or key[2] in RELEASE_FILTERS
+        or (key[2] is None and get_snapshot() is not None)
+        or rendered_bodies.get(key, data_stamp()) is not None
+    )
+
+    async def on_queued(position: int) -> None:
+        await update.message.reply_text(f"Ваш запрос в очереди, позиция {position}")
+
+    return get_admission().admit(update.effective_user.id, on_queued, bypass_queue=cheap)
+
+
+async def reply_admission_error(update: Update, error: AdmissionError) -> None:
+    if isinstance(error, UserBusyError):
+        text = "Предыдущий запрос ещё выполняется, дождитесь ответа"
+    else:
+        text = "Сейчас слишком много запросов, попробуйте через минуту"
+    await update.message.reply_text(text, reply_markup=build_main_menu(update.effective_user.id))
+
+
+async def start_request(update: Update, context: ContextTypes.DEFAULT_TYPE, key: tuple,
+                        answer: Callable[[Admission], Awaitable[None]]) -> None:
+    # Очередь проверяем сразу, а сама загрузка идёт фоновой задачей приложения:
+    # апдейты других пользователей не ждут Maven, а ConversationHandler получает их по одному
+    try:
+        admission = admit_request(update, key)
+    except AdmissionError as e:
+        await reply_admission_error(update, e)
+        return
+    context.application.create_task(answer(admission), update=update)
+
+
+@instrumented
+async def answer_version(update: Update, admission: Admission, project: str, build_type: str) -> None:
+    try:
+        async with admission:
+            message = await render_combination(project, build_type, None)
         await update.message.reply_text(
             message,
             reply_markup=build_main_menu(update.effective_user.id),
@@ -371,18 +478,115 @@ async def send_version(update: Update, context: ContextTypes.DEFAULT_TYPE, build
         )
     except Exception as e:
         await update.message.reply_text(f"Ошибка: {str(e)}")
-    finally:
-        context.user_data.clear()
 
 
-def get_pom_url(module: str, build: bool = False) -> str:
-    if build and module.startswith("engdb."):
-        base = module[len("engdb."):]
-        return UNIFIED_POM_URLS.get(base)
-    return UNIFIED_POM_URLS.get(module)
+@instrumented
+async def send_version(update: Update, context: ContextTypes.DEFAULT_TYPE, build_type: str):
+    project = context.user_data["project"]
+    context.user_data.clear()
+    await start_request(
+        update, context, (project, build_type, None),
+        lambda admission: answer_version(update, admission, project, build_type),
+    )
+
+PENDING_MARK = "⏳"
+
+
+def format_properties_md(properties: list[PomProperty]) -> list[str]:
+    # Теги и отступы экранированы заранее в плане проекта, здесь подставляется только версия
+    lines = []
+    for prop in properties:
+        if prop.pending:
+            safe_version = PENDING_MARK
+        else:
+            safe_version = escape_md(prop.value) if prop.value else "N/A"
+        lines.append(f"{prop.entry.md_open}{safe_version}{prop.entry.md_close}")
+    return lines
+
+
+def format_pom_body(resolution: PomResolution) -> str:
+    # Промежуточный результат: готовые модули выше ожидающих
+    def ordered(properties: list[PomProperty]) -> list[PomProperty]:
+        return properties if resolution.complete else sorted(properties, key=lambda prop: prop.pending)
+
+    build_lines = ["<properties>", "    <!-- CORE VERSIONS -->"]
+    build_lines += format_properties_md(ordered(resolution.core))
+    build_lines.append("    <!-- MODULES VERSIONS -->")
+    build_lines += format_properties_md(ordered(resolution.modules))
+    build_lines.append("</properties>")
+
+    return (
+        f"*Комбинация:* {escape_md(f'{resolution.project} POM')}\n\n"
+        f"*Тип версий:* {escape_md(resolution.version_type)}\n\n"
+        f"*Локальный pom:*\n```\n" + "\n".join(format_properties_md(ordered(resolution.local))) + "\n```\n"
+        f"*Сборка:*\n```\n" + "\n".join(build_lines) + "\n```\n"
+    )
+
+
+def format_pom_footer(elapsed: float, actual_at: datetime, at: datetime | None = None, pending: int = 0) -> str:
+    # Вместо времени обработки у промежуточного результата — прогресс
+    if pending:
+        status = f"_{PENDING_MARK} Загружается модулей: {pending}_\n"
+    else:
+        status = f"_Время обработки: {escape_md(f'{elapsed:.2f} сек')}_\n"
+    return status + format_actual_at(actual_at, "по состоянию на" if at is not None else "актуально на")
+
+
+def format_pom_message(resolution: PomResolution) -> str:
+    pending = sum(prop.pending for prop in resolution.properties)
+    return format_pom_body(resolution) + format_pom_footer(
+        resolution.elapsed, resolution.actual_at, resolution.at, pending
+    )
+
 
+async def render_pom_version(project: str, version_type: str,
+                             on_progress: Callable[[str], None] | None = None,
+                             at: datetime | None = None) -> str:
+    # Тело ответа кэшируется до изменения данных; время обработки и "актуально на" — свои у каждого запроса
+    start_time = time.time()
+    key = (project, "POM", version_type)
+    stamp = data_stamp()
+    if at is None:
+        body = cached_body(key, stamp)
+        if body is not None:
+            snapshot = get_snapshot()
+            actual_at = snapshot.taken_at if version_type not in RELEASE_FILTERS else datetime.now()
+            return body + format_pom_footer(time.time() - start_time, actual_at)
+
+    def report(resolution: PomResolution) -> None:
+        on_progress(format_pom_message(resolution))
+
+    resolution = await resolve_pom(project, version_type, report if on_progress is not None else None, at)
+    body = format_pom_body(resolution)
+    # Версии, догруженные из Maven во время запроса, в версию данных не входят — такой ответ не кэшируем
+    if at is None and not resolution.live:
+        rendered_bodies.put(key, stamp, body)
+    return body + format_pom_footer(resolution.elapsed, resolution.actual_at, resolution.at)
+
+
+@instrumented
+async def answer_pom_version(update: Update, admission: Admission, project: str, version_type: str,
+                             at: datetime | None = None) -> None:
+    try:
+        async with admission:
+            # Сообщение с ReplyKeyboardMarkup Telegram редактировать не даёт: заглушка уходит без клавиатуры
+            # и правится по мере загрузки модулей, а главное меню возвращает итоговое сообщение
+            placeholder = await update.message.reply_text("Начинаю сбор информации, подождите, пожалуйста...")
+            progress = ProgressMessage(placeholder, PROGRESS_EDIT_INTERVAL)
+            try:
+                message = await render_combination(project, "POM", version_type, progress.update, at)
+                await progress.finish(message, reply_markup=build_main_menu(update.effective_user.id))
+            except Exception:
+                await progress.cancel()
+                raise
+    except Exception as e:
+        error_msg = escape_md(f"Ошибка: {str(e)}")
+        await update.message.reply_text(error_msg)
 
-async def send_pom_version(update: Update, context: ContextTypes.DEFAULT_TYPE, version_type: str):
+
+@instrumented
+async def send_pom_version(update: Update, context: ContextTypes.DEFAULT_TYPE, version_type: str,
+                           at: datetime | None = None):
     # Проверяем наличие проекта в user_data
     project = context.user_data.get("project")
     if not project:
@@ -408,119 +612,222 @@ async def send_pom_version(update: Update, context: ContextTypes.DEFAULT_TYPE, v
         context.user_data.clear()
         return
 
-    combination = f"{project} POM"
-    use_tested_versions = version_type in ["Допущено к установке", "Допущено к тестированию"]
+    context.user_data.clear()
+    await start_request(
+        update, context, (project, "POM", version_type),
+        lambda admission: answer_pom_version(update, admission, project, version_type, at),
+    )
 
-    def escape_md(text: str) -> str:
-        escape_chars = r'_*[]()~`>#+-=|{}.!'
-        return re.sub(f'([{re.escape(escape_chars)}])', r'\\\1', str(text))
 
-    await update.message.reply_text("Начинаю сбор информации, подождите, пожалуйста...")
-    start_time = time.time()
+def build_table(rows: list[list[str]]) -> str:
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows
+    )
+
+
+async def render_matrix() -> str:
+    # Один проход по индексу и один набор запросов метаданных на все проекты сразу
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        index, actual_at = snapshot.index, snapshot.taken_at
+    else:
+        index, actual_at = await parse_index(URL), datetime.now()
+
+    build_types = ["DEV", "STAND", "PROD"]
+    distr_rows = [["Проект", *build_types]]
+    for project, builds in PRODUCT_BUTTONS.items():
+        row = [project]
+        for build_type in build_types:
+            product = builds.get(build_type)
+            row.append(str(index[product]) if product in index else "—")
+        distr_rows.append(row)
+
+    # Те же модули, что в ответе по проекту: локальный pom и сборка (CORE, MODULES), без повторов
+    urls: dict[str, str | None] = {}
+    module_projects: dict[str, list[str]] = {}
+    for project, plan in get_plans().items():
+        for entry in plan.local + plan.core + plan.modules:
+            if entry.release_module is None:
+                continue
+            urls.setdefault(entry.release_module, entry.url)
+            projects = module_projects.setdefault(entry.release_module, [])
+            if project not in projects:
+                projects.append(project)
+    pom_versions = dict(snapshot.pom_versions) if snapshot is not None else {}
+    missing = list(dict.fromkeys(url for url in urls.values() if url and url not in pom_versions))
+    if missing:
+        pom_versions.update(await resolve_pom_versions(missing))
+
+    pom_rows = [["Модуль", "Релиз", "Проекты"]]
+    for module, url in urls.items():
+        version = pom_versions.get(url, "URL не задан") if url else "URL не задан"
+        pom_rows.append([module, version, " ".join(module_projects[module])])
+
+    return (
+        f"*Дистрибутивы:*\n```\n{escape_md(build_table(distr_rows))}\n```\n"
+        f"*POM, новейший релиз:*\n```\n{escape_md(build_table(pom_rows))}\n```\n"
+        + format_actual_at(actual_at)
+    )
 
-    try:
-        version_filter = None
-        if version_type == "Допущено к установке":
-            version_filter = "установке"
-        elif version_type == "Допущено к тестированию":
-            version_filter = "тестированию"
-
-        releases = []
-        if use_tested_versions:
-            all_releases = load_releases()
-            releases = [r for r in all_releases if r.get("version_type") == version_filter]
-
-        def get_version(module_name: str) -> str:
-            if use_tested_versions:
-                module_entries = [r for r in releases if r['module'] == module_name]
-                if module_entries:
-                    return max(module_entries, key=lambda x: Version(x['version']))['version']
-            return None
-
-        local_versions = []
-        for module in POM_MODULES[project]:
-            base_name = module.replace("engdb.", "", 1)
-            version = get_version(base_name)
-
-            if not version and not use_tested_versions:
-                url = get_pom_url(module, build=False)
-                version = parse_pom_version(url) if url else "URL не задан"
-
-            safe_module = escape_md(module)
-            safe_version = escape_md(version) if version else "N/A"
-            local_versions.append(f"<{safe_module}.version>{safe_version}</{safe_module}.version>")
-
-        build_config = POM_BUILD_MODULES.get(project, {})
-        build_lines = ["<properties>", "    <!-- CORE VERSIONS -->"]
-
-        def process_modules(module_list):
-            for module in module_list:
-                if module == "engdb.help.branch":
-                    build_lines.append("    <engdb.help.branch>INSERT NAME</engdb.help.branch>")
-                    continue
-
-                base_name = module.replace("engdb.", "", 1)
-                version = get_version(base_name)
-
-                if not version and not use_tested_versions:
-                    url = get_pom_url(module, build=True)
-                    version = parse_pom_version(url) if url else "URL не задан"
-
-                safe_module = escape_md(module)
-                safe_version = escape_md(version) if version else "N/A"
-                build_lines.append(f"    <{safe_module}.version>{safe_version}</{safe_module}.version>")
-
-        process_modules(build_config.get("CORE", []))
-        build_lines.append("    <!-- MODULES VERSIONS -->")
-        process_modules(build_config.get("MODULES", []))
-        build_lines.append("</properties>")
-
-        elapsed = time.time() - start_time
-        now = (datetime.now() + timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
-
-        safe_combination = escape_md(combination)
-        safe_elapsed = escape_md(f"{elapsed:.2f} сек")
-        safe_now = escape_md(now)
-
-        message = (
-            f"*Комбинация:* {safe_combination}\n\n"
-            f"*Тип версий:* {escape_md(version_type)}\n\n"
-            f"*Локальный pom:*\n```\n" + "\n".join(local_versions) + "\n```\n"
-            f"*Сборка:*\n```\n" + "\n".join(build_lines) + "\n```\n"
-            f"_Время обработки: {safe_elapsed}_\n"
-            f"\\(актуально на {safe_now} по МСК\\)"
-        )
 
+@instrumented
+async def matrix(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    try:
+        message = await rendered_results.do(("matrix", None, None), render_matrix)
         await update.message.reply_text(
             message,
             reply_markup=build_main_menu(update.effective_user.id),
             parse_mode="MarkdownV2"
         )
     except Exception as e:
-        error_msg = escape_md(f"Ошибка: {str(e.with_traceback())}")
-        await update.message.reply_text(error_msg)
-    finally:
-        context.user_data.clear()
+        await update.message.reply_text(f"Ошибка: {str(e)}")
+    return MAIN_MENU
+
 
+INLINE_VERSION_HINTS = {
+    "Допущено к установке": ("установ",),
+    "Допущено к тестированию": ("тест",),
+    "Новейший релиз": ("новейш", "последн", "latest"),
+}
 
+
+def parse_inline_query(query: str) -> list[tuple[str, str, str | None]]:
+    # "PRV PROD", "TMIK POM установке", "PRV" -> список (проект, сборка, тип версий)
+    words = query.split()
+    if not words:
+        return []
+
+    project = next((p for p in PRODUCT_BUTTONS if p.lower() == words[0].lower()), None)
+    if project is None:
+        return []
+    build_types = list(PRODUCT_BUTTONS[project])
+    if len(words) > 1:
+        build_types = [b for b in build_types if b.lower().startswith(words[1].lower())]
+
+    version_types = list(POM_VERSION_TYPES)
+    if len(words) > 2:
+        # Запрос приходит на каждое нажатие: недописанное слово ("у", "уст") сужает выбор только
+        # когда однозначно, иначе показываются все типы версий
+        hint = words[2].lower()
+        matched = [
+            version_type for version_type, stems in INLINE_VERSION_HINTS.items()
+            if any(stem.startswith(hint) or hint.startswith(stem) for stem in stems)
+        ]
+        if len(matched) == 1:
+            version_types = matched
+
+    combinations = []
+    for build_type in build_types:
+        if build_type != "POM":
+            combinations.append((project, build_type, None))
+        elif project in POM_MODULES and POM_MODULES[project]:
+            combinations.extend((project, build_type, version_type) for version_type in version_types)
+    return combinations
+
+
+@instrumented
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    combinations = parse_inline_query(update.inline_query.query)
+    messages = await asyncio.gather(
+        *(render_combination(*combination) for combination in combinations),
+        return_exceptions=True,
+    )
+
+    results = []
+    for (project, build_type, version_type), message in zip(combinations, messages):
+        if isinstance(message, Exception):
+            logging.error(f"Ошибка inline-запроса {project} {build_type}: {message}")
+            continue
+        code = POM_VERSION_TYPES[version_type] if version_type else "distr"
+        results.append(InlineQueryResultArticle(
+            id=f"{project}:{build_type}:{code}",
+            title=f"{project} {build_type}",
+            description=version_type or "projectDistr",
+            input_message_content=InputTextMessageContent(message, parse_mode="MarkdownV2"),
+        ))
+    await update.inline_query.answer(results, cache_time=INLINE_CACHE_TIME)
+
+
+@instrumented
 async def handle_subscription(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    subs = load_subscriptions()
 
-    if user_id in subs["users"]:
-        subs["users"].remove(user_id)
-        text = "❌ Вы отписались"
-    else:
-        subs["users"].append(user_id)
+    if get_subscriptions().toggle(user_id):
         text = "✅ Вы подписались"
+    else:
+        text = "❌ Вы отписались"
 
-    save_subscriptions(subs)
     await update.message.reply_text(text, reply_markup=build_main_menu(user_id))
     return MAIN_MENU
 
 
-def main() -> None:
-    application = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+_background_tasks: list[asyncio.Task] = []
+_servers: list[HttpServer] = []
+
+
+async def warm_up() -> None:
+    # Разборщики и хранилище релизов поднимаются в фоне, пока идёт подключение к Telegram,
+    # а не на первом запросе пользователя
+    try:
+        await asyncio.to_thread(warm_up_parsers)
+        get_release_store()
+    except Exception as e:
+        logging.error(f"Ошибка прогрева при запуске: {e}")
+        return
+    startup.mark("warm_up")
+
+
+async def post_init(application: Application) -> None:
+    get_subscriptions()
+    snapshot = await asyncio.to_thread(load_snapshot)
+    if snapshot is not None:
+        logging.info(f"Загружен снимок версий от {snapshot.taken_at:%Y-%m-%d %H:%M:%S}")
+    _background_tasks.append(asyncio.create_task(run_refresher(
+        SNAPSHOT_REFRESH_INTERVAL,
+        on_refresh=lambda previous, current: notify_upstream_changes(application.bot, previous, current),
+    )))
+    if METRICS_PORT:
+        metrics_server = build_metrics_server(METRICS_LISTEN, METRICS_PORT)
+        await metrics_server.start()
+        _servers.append(metrics_server)
+    if API_PORT:
+        # HTTP API и режим webhook нужны не всем запускам: их модули импортируются, только когда включены
+        from api import build_api_server
+        api_server = build_api_server(API_LISTEN, API_PORT)
+        await api_server.start()
+        _servers.append(api_server)
+    _background_tasks.append(asyncio.create_task(warm_up()))
+    startup.mark("ready")
+
+
+async def post_stop(application: Application) -> None:
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    for server in _servers:
+        await server.stop()
+    _servers.clear()
+    await get_broadcaster().wait_closed(timeout=10)
+    await get_subscriptions().close()
+
+
+async def post_shutdown(application: Application) -> None:
+    await close_client()
+    get_release_store().close()
+
+
+def build_application(persistence: BasePersistence | None = None) -> Application:
+    application = (
+        ApplicationBuilder()
+        .token(TELEGRAM_TOKEN)
+        .persistence(persistence or create_persistence())
+        .post_init(post_init)
+        .post_stop(post_stop)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     add_release_conv = ConversationHandler(
         entry_points=[MessageHandler(filters.Text(["Добавить релиз"]), add_release_start)],
@@ -545,6 +852,8 @@ def main() -> None:
         },
         fallbacks=[CommandHandler("cancel", home)],
         map_to_parent={MAIN_MENU: MAIN_MENU},
+        name="add_release",
+        persistent=True,
     )
 
     get_version_conv = ConversationHandler(
@@ -562,25 +871,47 @@ def main() -> None:
                 MessageHandler(filters.TEXT & ~filters.Text(["🏠 Домой"]), get_version_type),
                 MessageHandler(filters.Text(["🏠 Домой"]), home)
             ],
+            GET_HISTORY_DATE: [
+                MessageHandler(filters.TEXT & ~filters.Text(["🏠 Домой"]), get_history_date),
+                MessageHandler(filters.Text(["🏠 Домой"]), home)
+            ],
         },
         fallbacks=[CommandHandler("cancel", home)],
         map_to_parent={MAIN_MENU: MAIN_MENU},
+        name="get_version",
+        persistent=True,
     )
 
     main_handler = ConversationHandler(
-        entry_points=[CommandHandler("start", start)],
+        entry_points=[CommandHandler("start", start), CommandHandler("matrix", matrix)],
         states={
             MAIN_MENU: [
                 add_release_conv,
                 get_version_conv,
                 MessageHandler(filters.Text(["Подписаться", "Отписаться"]), handle_subscription),
+                CommandHandler("matrix", matrix),
             ]
         },
         fallbacks=[CommandHandler("start", start)],
+        name="main",
+        persistent=True,
     )
 
     application.add_handler(main_handler)
-    application.run_polling()
+    application.add_handler(InlineQueryHandler(inline_query))
+    return application
+
+
+def main() -> None:
+    # Ошибки в конфигурации POM должны ронять запуск, а не запрос пользователя
+    get_plans()
+
+    application = build_application()
+    if BOT_MODE == "webhook":
+        from webhook import run_webhook
+        run_webhook(application)
+    else:
+        application.run_polling()
 
 
 if __name__ == "__main__":
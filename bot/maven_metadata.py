@@ -0,0 +1,81 @@
+from dataclasses import dataclass, field
+
+# Разбор maven-metadata.xml прямо по байтам ответа, без дерева BeautifulSoup.
+# Сущности и сетевые загрузки отключены: документ приходит с внешнего хоста.
+# "{*}tag" совпадает с тегом и без пространства имён, и в любом из них (modelVersion 1.1.0).
+
+# <release> стоит в начале документа: кормим парсер кусками и бросаем разбор, как только он закрыт
+CHUNK_SIZE = 1024
+
+# Документ для прогрева: разбор загружает lxml и его парсеры до первого запроса пользователя
+WARM_UP_DOCUMENT = (
+    b"<metadata><versioning><release>0</release><versions><version>0</version></versions></versioning></metadata>"
+)
+
+
+class MetadataError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class MavenMetadata:
+    release: str
+    latest: str | None = None
+    last_updated: str | None = None
+    versions: tuple[str, ...] = field(default_factory=tuple)
+
+
+_etree = None
+
+
+def _lxml():
+    # lxml импортируется при первом разборе, а не при старте бота: это заметная доля времени импорта
+    global _etree
+    if _etree is None:
+        from lxml import etree
+        _etree = etree
+    return _etree
+
+
+def _text(element) -> str:
+    # У этих тегов нет вложенных элементов, CDATA lxml уже склеивает в .text
+    return (element.text or "").strip()
+
+
+def _first_text(root, tag: str) -> str | None:
+    element = next(root.iter(tag), None)
+    return _text(element) if element is not None else None
+
+
+def parse_release(content: bytes) -> str:
+    # Парсер lxml нельзя делить между потоками, поэтому создаётся на каждый вызов
+    parser = _lxml().XMLPullParser(
+        events=("end",), tag="{*}release", resolve_entities=False, no_network=True, remove_comments=True
+    )
+    for start in range(0, len(content), CHUNK_SIZE):
+        parser.feed(content[start:start + CHUNK_SIZE])
+        for _, element in parser.read_events():
+            return _text(element)
+    parser.close()
+    raise MetadataError("В maven-metadata.xml нет <release>")
+
+
+def parse_metadata(content: bytes) -> MavenMetadata:
+    # Один проход парсера по документу: <release>, <latest>, <lastUpdated> и список <versions>
+    etree = _lxml()
+    root = etree.fromstring(content, etree.XMLParser(resolve_entities=False, no_network=True, remove_comments=True))
+    release = _first_text(root, "{*}release")
+    if release is None:
+        raise MetadataError("В maven-metadata.xml нет <release>")
+    versions = next(root.iter("{*}versions"), None)
+    return MavenMetadata(
+        release,
+        _first_text(root, "{*}latest"),
+        _first_text(root, "{*}lastUpdated"),
+        tuple(_text(element) for element in versions.iterchildren("{*}version")) if versions is not None else (),
+    )
+
+
+def warm_up() -> None:
+    parse_release(WARM_UP_DOCUMENT)
+    parse_metadata(WARM_UP_DOCUMENT)
@@ -0,0 +1,215 @@
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import startup
+from http_server import HttpServer, Request, Response
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple[str, ...], labelvalues: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        counts = self._counts.setdefault(key, [0] * len(self.buckets))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> Iterator[str]:
+        for key, counts in self._counts.items():
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {count}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(self._sums[key])}"
+            yield f"{self.name}_count{labels} {counts[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+        # Вызываются перед выдачей метрик, чтобы подтянуть значения из других модулей
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+HANDLER_LATENCY = registry.register(Histogram(
+    "bot_handler_duration_seconds", "Время обработки апдейта обработчиком", ("handler",)
+))
+HANDLER_ERRORS = registry.register(Counter(
+    "bot_handler_errors_total", "Необработанные исключения в обработчиках", ("handler",)
+))
+HANDLER_IN_FLIGHT = registry.register(Gauge(
+    "bot_handler_in_flight", "Обработчики, выполняющиеся прямо сейчас", ("handler",)
+))
+UPSTREAM_LATENCY = registry.register(Histogram(
+    "bot_upstream_request_duration_seconds", "Время запроса к внешнему хосту", ("kind", "url")
+))
+UPSTREAM_ERRORS = registry.register(Counter(
+    "bot_upstream_errors_total", "Ошибки запросов к внешним хостам", ("kind", "url")
+))
+UPSTREAM_IN_FLIGHT = registry.register(Gauge(
+    "bot_upstream_in_flight", "Запросы к внешним хостам в процессе", ("kind",)
+))
+CIRCUIT_OPEN = registry.register(Gauge(
+    "bot_upstream_circuit_open", "1, если запросы к хосту временно не выполняются", ("host",)
+))
+ADMISSION_ACTIVE = registry.register(Gauge(
+    "bot_admission_active", "Тяжёлые запросы, выполняющиеся прямо сейчас"
+))
+ADMISSION_QUEUED = registry.register(Gauge(
+    "bot_admission_queued", "Тяжёлые запросы, ожидающие в очереди"
+))
+ADMISSION_REJECTED = registry.register(Counter(
+    "bot_admission_rejected_total", "Запросы, не принятые в работу", ("reason",)
+))
+CACHE_EVENTS = registry.register(Counter(
+    "bot_cache_events_total", "Обращения к кэшу по результату", ("cache", "result")
+))
+CACHE_HIT_RATIO = registry.register(Gauge(
+    "bot_cache_hit_ratio", "Доля обращений к кэшу без полной загрузки", ("cache",)
+))
+WATCHER_CHANGES = registry.register(Counter(
+    "bot_watcher_changes_total", "Новые версии, найденные наблюдателем за индексом и Maven", ("source",)
+))
+STARTUP_SECONDS = registry.register(Gauge(
+    "bot_startup_seconds", "Время от запуска процесса до фазы холодного старта", ("phase",)
+))
+
+
+def _collect_startup_metrics() -> None:
+    for phase, seconds in startup.phases.items():
+        STARTUP_SECONDS.set(seconds, phase=phase)
+
+
+registry.add_collector(_collect_startup_metrics)
+
+
+def instrumented(handler: Callable) -> Callable:
+    name = handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        HANDLER_IN_FLIGHT.inc(handler=name)
+        started = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, handler=name)
+            HANDLER_IN_FLIGHT.dec(handler=name)
+            startup.mark("first_response")
+
+    return wrapper
+
+
+@contextmanager
+def track_upstream(kind: str, url: str) -> Iterator[None]:
+    UPSTREAM_IN_FLIGHT.inc(kind=kind)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(kind=kind, url=url)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, kind=kind, url=url)
+        UPSTREAM_IN_FLIGHT.dec(kind=kind)
+
+
+def build_metrics_server(host: str, port: int) -> HttpServer:
+    server = HttpServer(host, port)
+
+    async def handle_metrics(request: Request) -> Response:
+        return Response(200, registry.render().encode(), "text/plain; version=0.0.4; charset=utf-8")
+
+    server.route("GET", "/metrics", handle_metrics)
+    return server
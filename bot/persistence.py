@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from config import PERSISTENCE_DB_PATH, PERSISTENCE_FLUSH_INTERVAL
+
+
+class SqlitePersistence(BasePersistence):
+    # Состояния диалогов и user_data в SQLite, чтобы рестарт продолжал диалоги с того же шага.
+    # Application сам собирает изменения раз в update_interval; здесь они копятся в памяти
+    # и пишутся одной транзакцией, а flush() при остановке дописывает остаток
+    def __init__(self, path: str, update_interval: float):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    PRIMARY KEY (name, key)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_data (user_id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+            )
+        # Ещё не записанные изменения, None — удалить запись
+        self._conversations: dict[tuple[str, str], str | None] = {}
+        self._user_data: dict[int, str | None] = {}
+        self._write_task: asyncio.Task | None = None
+
+    async def get_conversations(self, name: str) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, state FROM conversations WHERE name = ?", (name,)).fetchall()
+        return {tuple(json.loads(key)): json.loads(state) for key, state in rows}
+
+    async def update_conversation(self, name: str, key: tuple, new_state: object | None) -> None:
+        state = None if new_state is None else json.dumps(new_state)
+        self._conversations[(name, json.dumps(list(key)))] = state
+        self._schedule_write()
+
+    async def get_user_data(self) -> dict[int, dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, data FROM user_data").fetchall()
+        return {user_id: json.loads(data) for user_id, data in rows}
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        # Пустой user_data (диалог завершён) не храним
+        self._user_data[user_id] = json.dumps(data, ensure_ascii=False) if data else None
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._user_data[user_id] = None
+        self._schedule_write()
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    # chat_data, bot_data и callback_data бот не использует
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    def _schedule_write(self) -> None:
+        # Application вызывает update_* пачкой через gather: запись стартует после того, как отработают все
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.get_running_loop().create_task(self._write())
+
+    async def _write(self) -> None:
+        await asyncio.sleep(0)
+        conversations, self._conversations = self._conversations, {}
+        user_data, self._user_data = self._user_data, {}
+        if not conversations and not user_data:
+            return
+        try:
+            await asyncio.to_thread(self._commit, conversations, user_data)
+        except sqlite3.Error as e:
+            logging.error(f"Ошибка сохранения состояния диалогов: {e}")
+            # Вернём в очередь, не затирая более свежие изменения
+            for key, state in conversations.items():
+                self._conversations.setdefault(key, state)
+            for user_id, data in user_data.items():
+                self._user_data.setdefault(user_id, data)
+
+    def _commit(self, conversations: dict[tuple[str, str], str | None], user_data: dict[int, str | None]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM conversations WHERE name = ? AND key = ?",
+                [key for key, state in conversations.items() if state is None],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO conversations (name, key, state) VALUES (?, ?, ?)",
+                [(name, key, state) for (name, key), state in conversations.items() if state is not None],
+            )
+            self._conn.executemany(
+                "DELETE FROM user_data WHERE user_id = ?",
+                [(user_id,) for user_id, data in user_data.items() if data is None],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO user_data (user_id, data) VALUES (?, ?)",
+                [(user_id, data) for user_id, data in user_data.items() if data is not None],
+            )
+
+    async def flush(self) -> None:
+        # Вызывается Application один раз при завершении, после последнего update_persistence
+        if self._write_task is not None:
+            await asyncio.gather(self._write_task, return_exceptions=True)
+        await self._write()
+        with self._lock:
+            self._conn.close()
+
+
+def create_persistence() -> SqlitePersistence:
+    return SqlitePersistence(PERSISTENCE_DB_PATH, PERSISTENCE_FLUSH_INTERVAL)
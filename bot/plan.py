@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from config import (
+    MODULES_LIST,
+    POM_MODULES,
+    POM_BUILD_MODULES,
+    POM_UNTRACKED_MODULES,
+    UNIFIED_POM_URLS,
+)
+from formatting import escape_md
+
+# План сборки POM по каждому проекту: собирается из config.py один раз при старте и проверяется,
+# так что ошибка в конфиге роняет запуск, а не запрос пользователя
+
+BUILD_PREFIX = "engdb."
+HELP_BRANCH = "engdb.help.branch"
+HELP_BRANCH_PLACEHOLDER = "INSERT NAME"
+BUILD_INDENT = "    "
+
+
+class PlanError(ValueError):
+    pass
+
+
+class UnknownProjectError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class PlanEntry:
+    # Одна строка <properties>: тег, откуда брать версию и готовые к подстановке куски разметки
+    name: str
+    release_module: str | None
+    url: str | None
+    static_value: str | None
+    xml_open: str
+    xml_close: str
+    md_open: str
+    md_close: str
+
+
+@dataclass(frozen=True)
+class ProjectPlan:
+    project: str
+    local: tuple[PlanEntry, ...]
+    core: tuple[PlanEntry, ...]
+    modules: tuple[PlanEntry, ...]
+    # Уникальные maven-metadata.xml проекта: один и тот же модуль не запрашивается дважды
+    urls: tuple[str, ...]
+
+
+def _entry(name: str, indent: str, release_module: str | None = None, url: str | None = None,
+           static_value: str | None = None) -> PlanEntry:
+    safe_name = escape_md(name)
+    return PlanEntry(
+        name=name,
+        release_module=release_module,
+        url=url,
+        static_value=static_value,
+        xml_open=f"{indent}<{name}>",
+        xml_close=f"</{name}>",
+        md_open=f"{indent}<{safe_name}>",
+        md_close=f"</{safe_name}>",
+    )
+
+
+def _module_url(module: str, errors: list[str], where: str) -> str | None:
+    if module not in UNIFIED_POM_URLS:
+        errors.append(f"{where}: для модуля {module} нет адреса в UNIFIED_POM_URLS")
+    if module not in MODULES_LIST and module not in POM_UNTRACKED_MODULES:
+        errors.append(f"{where}: модуль {module} не найден ни в MODULES_LIST, ни в POM_UNTRACKED_MODULES")
+    return UNIFIED_POM_URLS.get(module)
+
+
+def _local_entries(project: str, errors: list[str]) -> tuple[PlanEntry, ...]:
+    where = f"POM_MODULES[{project}]"
+    return tuple(
+        _entry(f"{module}.version", "", module, _module_url(module, errors, where))
+        for module in POM_MODULES[project]
+    )
+
+
+def _build_entries(project: str, section: str, errors: list[str]) -> tuple[PlanEntry, ...]:
+    where = f"POM_BUILD_MODULES[{project}][{section}]"
+    entries = []
+    for module in POM_BUILD_MODULES[project].get(section, []):
+        if module == HELP_BRANCH:
+            entries.append(_entry(HELP_BRANCH, BUILD_INDENT, static_value=HELP_BRANCH_PLACEHOLDER))
+        elif not module.startswith(BUILD_PREFIX):
+            errors.append(f"{where}: модуль {module} без префикса {BUILD_PREFIX}")
+        else:
+            base = module[len(BUILD_PREFIX):]
+            entries.append(_entry(f"{module}.version", BUILD_INDENT, base, _module_url(base, errors, where)))
+    return tuple(entries)
+
+
+def compile_plans() -> Mapping[str, ProjectPlan]:
+    errors = []
+    for project in sorted(POM_BUILD_MODULES.keys() - POM_MODULES.keys()):
+        errors.append(f"POM_BUILD_MODULES: проекта {project} нет в POM_MODULES")
+
+    plans = {}
+    for project, local_modules in POM_MODULES.items():
+        if not local_modules:
+            continue
+        if project not in POM_BUILD_MODULES:
+            errors.append(f"POM_MODULES: для проекта {project} нет POM_BUILD_MODULES")
+            continue
+        local = _local_entries(project, errors)
+        core = _build_entries(project, "CORE", errors)
+        modules = _build_entries(project, "MODULES", errors)
+        urls = tuple(dict.fromkeys(entry.url for entry in local + core + modules if entry.url))
+        plans[project] = ProjectPlan(project, local, core, modules, urls)
+
+    if errors:
+        raise PlanError("Ошибки в конфигурации POM:\n" + "\n".join(errors))
+    return MappingProxyType(plans)
+
+
+_plans: Mapping[str, ProjectPlan] | None = None
+
+
+def get_plans() -> Mapping[str, ProjectPlan]:
+    global _plans
+    if _plans is None:
+        _plans = compile_plans()
+    return _plans
+
+
+def get_plan(project: str) -> ProjectPlan:
+    plan = get_plans().get(project)
+    if plan is None:
+        raise UnknownProjectError(f"Для проекта {project} отсутствуют модули")
+    return plan
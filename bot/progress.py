@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import time
+
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+from telegram_errors import retry_after_seconds
+
+
+class ProgressMessage:
+    # Редактирует сообщение-заглушку по мере готовности результата, но не чаще раза в interval секунд:
+    # промежуточные состояния между правками схлопываются, отправляется только последнее
+    def __init__(self, message, interval: float, parse_mode: str = "MarkdownV2"):
+        self.message = message
+        self.interval = interval
+        self.parse_mode = parse_mode
+        self._next_edit_at = 0.0
+        self._latest: str | None = None
+        self._shown: str | None = None
+        self._task: asyncio.Task | None = None
+        # Сообщение нельзя редактировать (удалено, ошибка Telegram): дальше только новое сообщение
+        self._broken = False
+
+    def update(self, text: str) -> None:
+        self._latest = text
+        if not self._broken and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        while not self._broken and self._latest is not None and self._latest != self._shown:
+            delay = self._next_edit_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._edit(self._latest)
+
+    async def _edit(self, text: str) -> bool:
+        self._next_edit_at = time.monotonic() + self.interval
+        try:
+            await self.message.edit_text(text, parse_mode=self.parse_mode)
+        except RetryAfter as e:
+            self._next_edit_at = time.monotonic() + retry_after_seconds(e)
+            return False
+        except BadRequest as e:
+            if "message is not modified" not in str(e).lower():
+                logging.warning(f"Не удалось обновить сообщение: {e}")
+                self._broken = True
+                return False
+        except TelegramError as e:
+            logging.warning(f"Не удалось обновить сообщение: {e}")
+            self._broken = True
+            return False
+        self._shown = text
+        return True
+
+    async def _stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def finish(self, text: str, reply_markup=None) -> None:
+        # Итог не ждёт interval: одна внеочередная правка укладывается в лимиты Telegram,
+        # а на flood control ждём сколько попросили и пробуем ещё раз.
+        # Если отредактировать так и не вышло, результат уходит новым сообщением
+        await self._stop()
+        if reply_markup is not None:
+            # Клавиатуру под полем ввода правкой не поставить: итог уходит новым сообщением, заглушка удаляется
+            await self.message.reply_text(text, parse_mode=self.parse_mode, reply_markup=reply_markup)
+            try:
+                await self.message.delete()
+            except TelegramError as e:
+                logging.warning(f"Не удалось удалить сообщение: {e}")
+            return
+        for _ in range(2):
+            if self._broken:
+                break
+            if await self._edit(text):
+                return
+            await asyncio.sleep(max(0.0, self._next_edit_at - time.monotonic()))
+        await self.message.reply_text(text, parse_mode=self.parse_mode)
+
+    async def cancel(self) -> None:
+        await self._stop()
@@ -0,0 +1,314 @@
+import bisect
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from packaging.version import Version
+
+from config import RELEASE_STORE_BACKEND, RELEASES_DB_PATH, RELEASES_HISTORY_PATH, RELEASES_JSON_PATH
+from fileutil import atomic_write
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ReleaseStore:
+    # Хранилище допущенных релизов: одна запись на пару (module, version_type)
+    # плюс история всех отметок, по которой восстанавливается состояние на любой момент.
+    # generation растёт при каждой записи: по нему кэши понимают, что данные изменились
+    generation = 0
+
+    def upsert(self, release: dict) -> None:
+        raise NotImplementedError
+
+    def get_version(self, module: str, version_type: str) -> str | None:
+        raise NotImplementedError
+
+    def get_versions(self, version_type: str) -> dict[str, str]:
+        raise NotImplementedError
+
+    def get_versions_at(self, version_type: str, at: datetime) -> dict[str, str]:
+        # Последняя отметка каждого модуля не позже at (время сервера, как в timestamp)
+        raise NotImplementedError
+
+    def all(self) -> list[dict]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonReleaseStore(ReleaseStore):
+    def __init__(self, path: str, history_path: str = RELEASES_HISTORY_PATH):
+        self.path = path
+        self.history_path = history_path
+        self._lock = threading.Lock()
+        # (module, version_type) -> (отсортированные timestamp, версии): файл истории читается один раз
+        self._history: dict[tuple[str, str], tuple[list[str], list[str]]] | None = None
+
+    def _load(self) -> list:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _save(self, data: list) -> None:
+        unique_entries = {}
+        for item in data:
+            key = (item["module"], item["version_type"])
+            unique_entries[key] = item
+        atomic_write(self.path, json.dumps(list(unique_entries.values()), ensure_ascii=False, indent=2))
+
+    def _index(self, release: dict) -> None:
+        timestamps, versions = self._history.setdefault((release["module"], release["version_type"]), ([], []))
+        position = bisect.bisect_right(timestamps, release["timestamp"])
+        timestamps.insert(position, release["timestamp"])
+        versions.insert(position, release["version"])
+
+    def _load_history(self) -> None:
+        self._history = {}
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+            return
+        except FileNotFoundError:
+            pass
+        # Истории ещё нет: начинаем её с текущих записей releases.json
+        seed = self._load()
+        with open(self.history_path, "a", encoding="utf-8") as f:
+            for release in seed:
+                f.write(json.dumps(release, ensure_ascii=False, separators=(",", ":")) + "\n")
+                self._index(release)
+
+    def upsert(self, release: dict) -> None:
+        # Запись идёт из потоков: чтение, замена записи и сохранение releases.json — под одной блокировкой
+        with self._lock:
+            releases = [
+                item for item in self._load()
+                if (item["module"], item["version_type"]) != (release["module"], release["version_type"])
+            ]
+            releases.append(release)
+            if self._history is None:
+                self._load_history()
+            with open(self.history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(release, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._index(release)
+            self._save(releases)
+            self.generation += 1
+
+    def get_version(self, module: str, version_type: str) -> str | None:
+        return self.get_versions(version_type).get(module)
+
+    def get_versions(self, version_type: str) -> dict[str, str]:
+        versions = {}
+        for item in self._load():
+            if item.get("version_type") != version_type:
+                continue
+            current = versions.get(item["module"])
+            if current is None or Version(item["version"]) > Version(current):
+                versions[item["module"]] = item["version"]
+        return versions
+
+    def get_versions_at(self, version_type: str, at: datetime) -> dict[str, str]:
+        bound = at.strftime(TIMESTAMP_FORMAT)
+        with self._lock:
+            if self._history is None:
+                self._load_history()
+            versions = {}
+            for (module, item_type), (timestamps, module_versions) in self._history.items():
+                position = bisect.bisect_right(timestamps, bound)
+                if item_type == version_type and position:
+                    versions[module] = module_versions[position - 1]
+        return versions
+
+    def all(self) -> list[dict]:
+        return self._load()
+
+
+class SqliteReleaseStore(ReleaseStore):
+    COLUMNS = ("module", "version_type", "version", "description", "timestamp", "user")
+
+    def __init__(self, path: str):
+        self.path = path
+        # Запись — через одно соединение под блокировкой; чтение — через соединение своего потока,
+        # без общей блокировки: в режиме WAL читатели не ждут ни друг друга, ни писателя
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS releases (
+                    module TEXT NOT NULL,
+                    version_type TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    description TEXT NOT NULL DEFAULT '',
+                    timestamp TEXT NOT NULL,
+                    user TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (module, version_type)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS releases_by_type ON releases (version_type, module, version)"
+            )
+            # Все отметки релизов, только дописываются; индекс даёт один поиск на модуль при запросе на дату
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS release_history (
+                    module TEXT NOT NULL,
+                    version_type TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    description TEXT NOT NULL DEFAULT '',
+                    user TEXT NOT NULL DEFAULT ''
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS release_history_at ON release_history (module, version_type, timestamp)"
+            )
+            # База из прошлой версии: история начинается с текущих записей
+            self._conn.execute(
+                """
+                INSERT INTO release_history (module, version_type, timestamp, version, description, user)
+                SELECT module, version_type, timestamp, version, description, user FROM releases
+                WHERE NOT EXISTS (SELECT 1 FROM release_history)
+                """
+            )
+
+    def upsert(self, release: dict) -> None:
+        row = {column: release.get(column, "") for column in self.COLUMNS}
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO releases (module, version_type, version, description, timestamp, user)
+                VALUES (:module, :version_type, :version, :description, :timestamp, :user)
+                ON CONFLICT (module, version_type) DO UPDATE SET
+                    version = excluded.version,
+                    description = excluded.description,
+                    timestamp = excluded.timestamp,
+                    user = excluded.user
+                """,
+                row,
+            )
+            self._conn.execute(
+                """
+                INSERT INTO release_history (module, version_type, timestamp, version, description, user)
+                VALUES (:module, :version_type, :timestamp, :version, :description, :user)
+                """,
+                row,
+            )
+            self.generation += 1
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False только ради close() из другого потока
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    def get_version(self, module: str, version_type: str) -> str | None:
+        row = self._reader().execute(
+            "SELECT version FROM releases WHERE module = ? AND version_type = ?",
+            (module, version_type),
+        ).fetchone()
+        return row["version"] if row else None
+
+    def get_versions(self, version_type: str) -> dict[str, str]:
+        rows = self._reader().execute(
+            "SELECT module, version FROM releases WHERE version_type = ?", (version_type,)
+        ).fetchall()
+        return {row["module"]: row["version"] for row in rows}
+
+    def get_versions_at(self, version_type: str, at: datetime) -> dict[str, str]:
+        # Модули берём из releases: в истории есть только те, что когда-то попали туда
+        rows = self._reader().execute(
+            """
+            SELECT r.module, (
+                SELECT h.version FROM release_history h
+                WHERE h.module = r.module AND h.version_type = r.version_type AND h.timestamp <= ?
+                ORDER BY h.timestamp DESC, h.rowid DESC LIMIT 1
+            ) AS version
+            FROM releases r WHERE r.version_type = ?
+            """,
+            (at.strftime(TIMESTAMP_FORMAT), version_type),
+        ).fetchall()
+        return {row["module"]: row["version"] for row in rows if row["version"] is not None}
+
+    def all(self) -> list[dict]:
+        rows = self._reader().execute("SELECT * FROM releases ORDER BY module, version_type").fetchall()
+        return [dict(row) for row in rows]
+
+    def is_empty(self) -> bool:
+        return self._reader().execute("SELECT 1 FROM releases LIMIT 1").fetchone() is None
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            self._conn.close()
+
+
+def import_json_releases(store: ReleaseStore, path: str) -> int:
+    # Разовый перенос releases.json: при дублях остаётся максимальная версия
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            releases = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+
+    latest = {}
+    for item in releases:
+        key = (item["module"], item["version_type"])
+        if key not in latest or Version(item["version"]) >= Version(latest[key]["version"]):
+            latest[key] = item
+    for item in latest.values():
+        store.upsert(item)
+    return len(latest)
+
+
+def create_release_store(backend: str = RELEASE_STORE_BACKEND) -> ReleaseStore:
+    if backend == "json":
+        return JsonReleaseStore(RELEASES_JSON_PATH)
+    if backend != "sqlite":
+        raise ValueError(f"Неизвестное хранилище релизов: {backend}")
+
+    store = SqliteReleaseStore(RELEASES_DB_PATH)
+    if store.is_empty() and os.path.exists(RELEASES_JSON_PATH):
+        imported = import_json_releases(store, RELEASES_JSON_PATH)
+        logging.info(f"Импортировано {imported} релизов из {RELEASES_JSON_PATH}")
+    return store
+
+
+_store: ReleaseStore | None = None
+
+
+def get_release_store() -> ReleaseStore:
+    global _store
+    if _store is None:
+        _store = create_release_store()
+    return _store
+
+
+if __name__ == "__main__":
+    # python bot/release_store.py [releases.json] — принудительный импорт в SQLite
+    source = sys.argv[1] if len(sys.argv) > 1 else RELEASES_JSON_PATH
+    count = import_json_releases(SqliteReleaseStore(RELEASES_DB_PATH), source)
+    print(f"Импортировано {count} релизов из {source} в {RELEASES_DB_PATH}")
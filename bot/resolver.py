@@ -0,0 +1,198 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Mapping
+from xml.sax.saxutils import escape
+
+from config import UNIFIED_POM_URLS
+from plan import PlanEntry, get_plan
+from release_store import get_release_store
+from snapshot import get_snapshot
+from upstream import POM_FETCH_ERROR, resolve_pom_versions
+
+# Сбор версий POM без привязки к Telegram: используется ботом, CLI и HTTP API
+
+POM_VERSION_TYPES = {
+    "Новейший релиз": "latest",
+    "Допущено к установке": "install",
+    "Допущено к тестированию": "test",
+}
+VERSION_TYPE_BY_CODE = {code: version_type for version_type, code in POM_VERSION_TYPES.items()}
+
+# Тип версий -> значение version_type в хранилище релизов
+RELEASE_FILTERS = {
+    "Допущено к установке": "установке",
+    "Допущено к тестированию": "тестированию",
+}
+
+
+@dataclass(frozen=True)
+class PomProperty:
+    # Строка плана и её значение; None — версия не найдена (N/A),
+    # pending — maven-metadata.xml ещё загружается (только в промежуточных результатах)
+    entry: PlanEntry
+    value: str | None
+    pending: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.entry.name
+
+    @property
+    def resolved(self) -> bool:
+        return not self.pending and self.value not in (None, POM_FETCH_ERROR)
+
+
+@dataclass(frozen=True)
+class PomResolution:
+    project: str
+    version_type: str
+    local: list[PomProperty] = field(default_factory=list)
+    core: list[PomProperty] = field(default_factory=list)
+    modules: list[PomProperty] = field(default_factory=list)
+    actual_at: datetime = field(default_factory=datetime.now)
+    elapsed: float = 0.0
+    # Запрос на дату: версии восстановлены по истории отметок на этот момент
+    at: datetime | None = None
+    # Часть версий загружена из Maven во время запроса, а не взята из снимка или хранилища релизов
+    live: bool = False
+
+    @property
+    def properties(self) -> list[PomProperty]:
+        return self.local + self.core + self.modules
+
+    @property
+    def complete(self) -> bool:
+        return not any(prop.pending for prop in self.properties)
+
+    @property
+    def unresolved(self) -> list[str]:
+        return [
+            prop.name for prop in self.properties
+            if not prop.resolved and prop.entry.static_value is None
+        ]
+
+
+def get_pom_url(module: str, build: bool = False) -> str:
+    if build and module.startswith("engdb."):
+        base = module[len("engdb."):]
+        return UNIFIED_POM_URLS.get(base)
+    return UNIFIED_POM_URLS.get(module)
+
+
+async def resolve_pom(project: str, version_type: str,
+                      on_progress: Callable[[PomResolution], None] | None = None,
+                      at: datetime | None = None) -> PomResolution:
+    # on_progress получает промежуточный результат после каждого загруженного maven-metadata.xml;
+    # at — состояние отметок на этот момент (время сервера), только для допущенных версий
+    start_time = time.time()
+    plan = get_plan(project)
+    if version_type not in POM_VERSION_TYPES:
+        raise ValueError(f"Неизвестный тип версий: {version_type}")
+    use_tested_versions = version_type in RELEASE_FILTERS
+    if at is not None and not use_tested_versions:
+        raise ValueError(f"Тип версий {version_type} не хранит историю")
+
+    # Чтение хранилища — в потоке, чтобы не держать цикл событий, пока идёт запись релиза
+    tested_versions = {}
+    store = get_release_store()
+    if at is not None:
+        tested_versions = await asyncio.to_thread(store.get_versions_at, RELEASE_FILTERS[version_type], at)
+    elif use_tested_versions:
+        tested_versions = await asyncio.to_thread(store.get_versions, RELEASE_FILTERS[version_type])
+
+    # Версии берём из фонового снимка, недостающие maven-metadata.xml скачиваем параллельно
+    known: Mapping[str, str] = {}
+    fetched: dict[str, str] = {}
+    actual_at = at or datetime.now()
+    if not use_tested_versions:
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            known, actual_at = snapshot.pom_versions, snapshot.taken_at
+    missing = [url for url in plan.urls if url not in known] if not use_tested_versions else []
+
+    def fill(entries: tuple[PlanEntry, ...]) -> list[PomProperty]:
+        properties = []
+        for entry in entries:
+            if entry.static_value is not None:
+                properties.append(PomProperty(entry, entry.static_value))
+                continue
+            version = tested_versions.get(entry.release_module)
+            if not version and not use_tested_versions:
+                if entry.url in known:
+                    version = known[entry.url]
+                elif entry.url in fetched:
+                    version = fetched[entry.url]
+                else:
+                    properties.append(PomProperty(entry, None, pending=True))
+                    continue
+            properties.append(PomProperty(entry, version or None))
+        return properties
+
+    def assemble() -> PomResolution:
+        return PomResolution(
+            project=project,
+            version_type=version_type,
+            local=fill(plan.local),
+            core=fill(plan.core),
+            modules=fill(plan.modules),
+            actual_at=actual_at,
+            elapsed=time.time() - start_time,
+            at=at,
+            live=bool(missing),
+        )
+
+    if missing:
+        def on_result(url: str, version: str) -> None:
+            fetched[url] = version
+            if on_progress is not None:
+                on_progress(assemble())
+
+        await resolve_pom_versions(missing, on_result=on_result)
+
+    return assemble()
+
+
+async def resolve_poms(projects: list[str], version_type: str) -> list[PomResolution]:
+    # Пакетный режим: общие для проектов maven-metadata.xml запрашиваются один раз
+    plans = [get_plan(project) for project in projects]
+    if version_type not in RELEASE_FILTERS:
+        snapshot = get_snapshot()
+        known = snapshot.pom_versions if snapshot is not None else {}
+        await resolve_pom_versions(url for plan in plans for url in plan.urls if url not in known)
+    return list(await asyncio.gather(*(resolve_pom(project, version_type) for project in projects)))
+
+
+def _xml_lines(properties: list[PomProperty]) -> list[str]:
+    return [
+        f"{prop.entry.xml_open}{escape(prop.value) if prop.value else 'N/A'}{prop.entry.xml_close}"
+        for prop in properties
+    ]
+
+
+def format_local_xml(resolution: PomResolution) -> str:
+    return "\n".join(_xml_lines(resolution.local))
+
+
+def format_build_xml(resolution: PomResolution) -> str:
+    lines = ["<properties>", "    <!-- CORE VERSIONS -->"]
+    lines += _xml_lines(resolution.core)
+    lines.append("    <!-- MODULES VERSIONS -->")
+    lines += _xml_lines(resolution.modules)
+    lines.append("</properties>")
+    return "\n".join(lines)
+
+
+def resolution_to_dict(resolution: PomResolution) -> dict:
+    def values(properties: list[PomProperty]) -> dict[str, str | None]:
+        return {prop.name: prop.value for prop in properties}
+
+    return {
+        "project": resolution.project,
+        "version_type": POM_VERSION_TYPES[resolution.version_type],
+        "actual_at": resolution.actual_at.isoformat(timespec="seconds"),
+        "local": values(resolution.local),
+        "build": values(resolution.core + resolution.modules),
+        "unresolved": resolution.unresolved,
+    }
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Awaitable, Callable, Mapping
+
+from packaging.version import Version
+
+from config import URL, UNIFIED_POM_URLS, SNAPSHOT_PATH
+from fileutil import atomic_write
+from upstream import POM_FETCH_ERROR, parse_index, resolve_pom_versions
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    # Последняя версия каждого продукта из индекса дистрибутивов
+    index: Mapping[str, Version]
+    # <release> из maven-metadata.xml по URL из UNIFIED_POM_URLS
+    pom_versions: Mapping[str, str]
+    taken_at: datetime
+    # Меняется только вместе с содержимым: обновление без изменений сдвигает лишь taken_at
+    generation: int = 0
+
+
+_current: Snapshot | None = None
+
+
+def get_snapshot() -> Snapshot | None:
+    return _current
+
+
+async def refresh_snapshot() -> Snapshot:
+    global _current
+    previous = _current
+    index, pom_versions = await asyncio.gather(
+        parse_index(URL),
+        resolve_pom_versions(UNIFIED_POM_URLS.values(), revalidate=True),
+        return_exceptions=True,
+    )
+    # Если источник сейчас недоступен, оставляем последнее известное значение,
+    # а время снимка не сдвигаем: "актуально на" не должно выдавать старые данные за свежие
+    stale = False
+    if isinstance(index, BaseException):
+        logging.error(f"Ошибка обновления индекса: {index}")
+        if previous is None:
+            raise index
+        index, stale = previous.index, True
+    if isinstance(pom_versions, BaseException):
+        logging.error(f"Ошибка обновления POM: {pom_versions}")
+        pom_versions, stale = (dict(previous.pom_versions) if previous else {}), previous is not None
+
+    if previous is not None:
+        for url, version in pom_versions.items():
+            if version == POM_FETCH_ERROR and url in previous.pom_versions:
+                pom_versions[url], stale = previous.pom_versions[url], True
+
+    index = _reuse(previous.index if previous else None, index)
+    pom_versions = _reuse(previous.pom_versions if previous else None, pom_versions)
+    generation = 0
+    if previous is not None:
+        unchanged = index is previous.index and pom_versions is previous.pom_versions
+        generation = previous.generation if unchanged else previous.generation + 1
+    _current = Snapshot(
+        index=index,
+        pom_versions=pom_versions,
+        taken_at=previous.taken_at if stale else datetime.now(),
+        generation=generation,
+    )
+    return _current
+
+
+def _reuse(previous: Mapping | None, current: Mapping) -> Mapping:
+    # Без изменений оставляем прежний объект: сравнение снимков сводится к проверке is
+    if previous is not None and (current is previous or previous == current):
+        return previous
+    return MappingProxyType(dict(current))
+
+
+def save_snapshot(snapshot: Snapshot, path: str = SNAPSHOT_PATH) -> None:
+    data = {
+        "taken_at": snapshot.taken_at.isoformat(),
+        "index": {product: str(version) for product, version in snapshot.index.items()},
+        "pom_versions": {
+            url: version for url, version in snapshot.pom_versions.items() if version != POM_FETCH_ERROR
+        },
+    }
+    atomic_write(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+
+def load_snapshot(path: str = SNAPSHOT_PATH) -> Snapshot | None:
+    # Снимок с диска публикуется как текущий: после рестарта ответы сразу идут из него,
+    # пока фоновое обновление не подтянет свежие данные
+    global _current
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        snapshot = Snapshot(
+            index=MappingProxyType({product: Version(v) for product, v in data["index"].items()}),
+            pom_versions=MappingProxyType(dict(data["pom_versions"])),
+            taken_at=datetime.fromisoformat(data["taken_at"]),
+        )
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError) as e:
+        logging.error(f"Не удалось прочитать снимок {path}: {e}")
+        return None
+    if _current is None:
+        _current = snapshot
+    return snapshot
+
+
+async def run_refresher(interval: float,
+                        on_refresh: Callable[[Snapshot, Snapshot], Awaitable[None]] | None = None) -> None:
+    # on_refresh получает предыдущий и новый снимок, если что-то изменилось
+    while True:
+        try:
+            previous = _current
+            snapshot = await refresh_snapshot()
+            await asyncio.to_thread(save_snapshot, snapshot)
+            if on_refresh is not None and previous is not None and (
+                snapshot.index is not previous.index or snapshot.pom_versions is not previous.pom_versions
+            ):
+                await on_refresh(previous, snapshot)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Ошибка фонового обновления: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,42 @@
+import logging
+import os
+import time
+
+# Время холодного старта: от запуска процесса до импорта модулей, готовности к апдейтам и первого ответа.
+# Момент запуска берётся из /proc/self/stat, поэтому в замер попадают и сам интерпретатор, и импорты,
+# выполненные до этого модуля
+
+PHASE_LABELS = {
+    "import": "модули импортированы",
+    "ready": "бот готов принимать апдейты",
+    "warm_up": "прогрев разборщиков завершён",
+    "first_response": "первый ответ пользователю",
+}
+
+
+def _process_started() -> float:
+    # Момент запуска процесса по часам time.monotonic(); без /proc — момент импорта этого модуля
+    try:
+        with open("/proc/self/stat") as f:
+            # Имя процесса в скобках может содержать пробелы: поля считаем после последней ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        age = time.clock_gettime(time.CLOCK_BOOTTIME) - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic()
+    return time.monotonic() - max(age, 0.0)
+
+
+_started = _process_started()
+phases: dict[str, float] = {}
+
+
+def elapsed() -> float:
+    return time.monotonic() - _started
+
+
+def mark(phase: str) -> None:
+    # Учитывается только первая отметка фазы: дальше это уже не холодный старт
+    if phase in phases:
+        return
+    phases[phase] = elapsed()
+    logging.info(f"Запуск: {PHASE_LABELS.get(phase, phase)} через {phases[phase]:.3f} сек")
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+import threading
+
+from config import SUBSCRIPTIONS_JSON_PATH, SUBSCRIPTIONS_FLUSH_DELAY
+from fileutil import atomic_write
+
+
+class SubscriptionStore:
+    # Подписчики живут в памяти, файл пишется отложенно, пачкой изменений
+    def __init__(self, path: str, flush_delay: float):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._users: set[int] = set(self._load())
+        self._dirty = False
+        self._flush_task: asyncio.Task | None = None
+        self._write_lock = threading.Lock()
+
+    def _load(self) -> list[int]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)["users"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return []
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._users
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def users(self) -> list[int]:
+        return list(self._users)
+
+    def add(self, user_id: int) -> None:
+        if user_id not in self._users:
+            self._users.add(user_id)
+            self._mark_dirty()
+
+    def remove(self, user_id: int) -> None:
+        if user_id in self._users:
+            self._users.discard(user_id)
+            self._mark_dirty()
+
+    def toggle(self, user_id: int) -> bool:
+        if user_id in self._users:
+            self.remove(user_id)
+            return False
+        self.add(user_id)
+        return True
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+            except RuntimeError:
+                # Вне цикла событий (скрипты, тесты) пишем сразу
+                self._write(sorted(self._users))
+                self._dirty = False
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self._write, sorted(self._users))
+            except OSError as e:
+                logging.error(f"Ошибка сохранения подписок: {e}")
+                self._dirty = True
+                return
+
+    def _write(self, users: list[int]) -> None:
+        with self._write_lock:
+            atomic_write(self.path, json.dumps({"users": users}, indent=2))
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+
+
+_store: SubscriptionStore | None = None
+
+
+def get_subscriptions() -> SubscriptionStore:
+    global _store
+    if _store is None:
+        _store = SubscriptionStore(SUBSCRIPTIONS_JSON_PATH, SUBSCRIPTIONS_FLUSH_DELAY)
+    return _store
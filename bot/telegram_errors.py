@@ -0,0 +1,11 @@
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    # В зависимости от версии python-telegram-bot retry_after — число секунд или timedelta
+    value = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import logging
+import re
+from typing import Callable, Iterable
+
+from packaging.version import Version
+
+import http_client
+from cache import MetadataCache
+from config import POM_CONCURRENCY, POM_CACHE_TTL, POM_CACHE_SIZE
+from maven_metadata import parse_release
+from metrics import CACHE_EVENTS, CACHE_HIT_RATIO, registry, track_upstream
+from singleflight import SingleFlight
+
+metadata_cache = MetadataCache(POM_CACHE_TTL, POM_CACHE_SIZE)
+
+POM_FETCH_ERROR = "Ошибка получения"
+
+# Одновременные запросы одного и того же ресурса идут в сеть один раз
+_in_flight = SingleFlight()
+# Последний успешно разобранный индекс: отдаётся, пока хост недоступен
+_last_index: dict[tuple[str, str | None], dict[str, Version]] = {}
+# Валидаторы и хэш тела последнего ответа индекса: если индекс не менялся, возвращается тот же объект,
+# и наблюдатель за изменениями не сравнивает его по содержимому
+_index_validators: dict[tuple[str, str | None], dict[str, str]] = {}
+_index_digests: dict[tuple[str, str | None], bytes] = {}
+
+
+def _collect_cache_metrics() -> None:
+    stats = metadata_cache.stats()
+    total = stats["hits"] + stats["misses"] + stats["revalidations"]
+    ratio = (stats["hits"] + stats["revalidations"]) / total if total else 0.0
+    CACHE_HIT_RATIO.set(ratio, cache="maven_metadata")
+
+
+registry.add_collector(_collect_cache_metrics)
+
+INDEX_HREF_RE = re.compile(r"""<a\s[^>]*?href\s*=\s*["']?([^"'\s>]+)""", re.IGNORECASE)
+TARBALL_RE = re.compile(r"^(.+)-(\d+(?:\.\d+)*)\.tar\.gz$")
+
+
+def _version_key(version: str) -> tuple[int, ...]:
+    # Для версий из одних цифр сравнение кортежей совпадает с Version, но намного дешевле
+    parts = [int(part) for part in version.split(".")]
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+def _collect_latest(text: str, latest: dict[str, tuple], product: str | None) -> None:
+    for href in INDEX_HREF_RE.findall(text):
+        match = TARBALL_RE.match(href)
+        if not match:
+            continue
+        name, ver = match.groups()
+        if product is not None and name != product:
+            continue
+        key = _version_key(ver)
+        current = latest.get(name)
+        if current is None or key > current[0]:
+            latest[name] = (key, ver)
+
+
+async def parse_index(url: str, product: str | None = None) -> dict[str, Version]:
+    key = (url, product)
+    try:
+        versions = await _in_flight.do(("index",) + key, lambda: _fetch_index(url, product))
+    except Exception as e:
+        if key not in _last_index:
+            raise
+        logging.warning(f"Индекс недоступен ({e!r}), используем последнюю известную версию")
+        return _last_index[key]
+    _last_index[key] = versions
+    return versions
+
+
+async def _fetch_index(url: str, product: str | None) -> dict[str, Version]:
+    # Индекс читается потоком: без DOM, храним только максимальную версию по каждому продукту
+    key = (url, product)
+    headers = _index_validators.get(key) if key in _last_index else None
+    latest: dict[str, tuple] = {}
+    tail = ""
+    digest = hashlib.sha1()
+    with track_upstream("index", url):
+        async with http_client.stream(url, headers=headers) as response:
+            if response.status_code == 304 and key in _last_index:
+                CACHE_EVENTS.inc(cache="index", result="revalidated")
+                return _last_index[key]
+            response.raise_for_status()
+            async for chunk in response.aiter_text():
+                digest.update(chunk.encode())
+                buffer = tail + chunk
+                # Незакрытый тег в конце куска переносим в следующий
+                cut = buffer.rfind("<")
+                if cut == -1:
+                    cut = len(buffer)
+                tail = buffer[cut:]
+                _collect_latest(buffer[:cut], latest, product)
+    _collect_latest(tail, latest, product)
+
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["If-None-Match"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["If-Modified-Since"] = response.headers["Last-Modified"]
+    _index_validators[key] = validators
+    # Сервер без ETag/Last-Modified отдаёт индекс целиком каждый раз — тогда сравниваем по хэшу тела
+    if _index_digests.get(key) == digest.digest() and key in _last_index:
+        CACHE_EVENTS.inc(cache="index", result="unchanged")
+        return _last_index[key]
+    _index_digests[key] = digest.digest()
+    CACHE_EVENTS.inc(cache="index", result="miss")
+    return {name: Version(ver) for name, (_, ver) in latest.items()}
+
+
+def get_metadata_url(url: str) -> str:
+    return url.replace("#/", "").rstrip("/") + "/maven-metadata.xml"
+
+
+async def parse_pom_version(url: str, revalidate: bool = False) -> str:
+    # revalidate=True всегда идёт в сеть, но с условным запросом
+    xml_url = get_metadata_url(url)
+    cached = metadata_cache.get(xml_url)
+    if cached is not None and not revalidate and metadata_cache.is_fresh(cached):
+        metadata_cache.hits += 1
+        CACHE_EVENTS.inc(cache="maven_metadata", result="hit")
+        return cached.value
+    return await _in_flight.do(("maven_metadata", xml_url), lambda: _fetch_pom_version(xml_url))
+
+
+async def _fetch_pom_version(xml_url: str) -> str:
+    cached = metadata_cache.get(xml_url)
+    try:
+        with track_upstream("maven_metadata", xml_url):
+            response = await http_client.get(xml_url, headers=metadata_cache.validators(cached))
+            if response.status_code != 304:
+                response.raise_for_status()
+        if response.status_code == 304 and cached is not None:
+            metadata_cache.refresh(xml_url)
+            CACHE_EVENTS.inc(cache="maven_metadata", result="revalidated")
+            return cached.value
+        metadata_cache.misses += 1
+        CACHE_EVENTS.inc(cache="maven_metadata", result="miss")
+        version = parse_release(response.content)
+        metadata_cache.put(
+            xml_url, version, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        )
+        return version
+    except Exception as e:
+        logging.error(f"Ошибка парсинга POM: {str(e)}")
+        if cached is not None:
+            # Хост недоступен или ответ битый: отдаём последнее известное значение
+            return cached.value
+        return POM_FETCH_ERROR
+
+
+async def resolve_pom_versions(urls: Iterable[str], revalidate: bool = False,
+                               on_result: Callable[[str, str], None] | None = None) -> dict[str, str]:
+    # Каждый URL запрашиваем один раз, не больше POM_CONCURRENCY одновременно;
+    # on_result вызывается по мере готовности каждого URL, не дожидаясь остальных
+    unique_urls = list(dict.fromkeys(url for url in urls if url))
+    semaphore = asyncio.Semaphore(POM_CONCURRENCY)
+
+    async def resolve(url: str) -> str:
+        async with semaphore:
+            version = await parse_pom_version(url, revalidate)
+        if on_result is not None:
+            on_result(url, version)
+        return version
+
+    versions = await asyncio.gather(*(resolve(url) for url in unique_urls))
+    return dict(zip(unique_urls, versions))
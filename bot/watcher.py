@@ -0,0 +1,73 @@
+from typing import Mapping
+
+from packaging.version import InvalidVersion, Version
+
+from config import PRODUCT_BUTTONS, UNIFIED_POM_URLS
+from metrics import WATCHER_CHANGES
+from plan import get_plans
+from snapshot import Snapshot
+from upstream import POM_FETCH_ERROR
+
+# Наблюдатель за внешними источниками: после каждого обновления снимка сравнивает его с предыдущим
+# и возвращает только появившиеся версии в формате релиза для notify_subscribers
+
+WATCHER_USER = "наблюдатель обновлений"
+
+
+def _is_newer(version: str, previous: str) -> bool:
+    try:
+        return Version(version) > Version(previous)
+    except InvalidVersion:
+        return version != previous
+
+
+def _changed(previous: Mapping, current: Mapping) -> list:
+    if current is previous:
+        return []
+    return [key for key, value in current.items() if previous.get(key) != value]
+
+
+def _release(module: str, version: str, previous: str | None, source: str, snapshot: Snapshot) -> dict:
+    return {
+        "module": module,
+        "version": version,
+        "description": f"Предыдущая версия: {previous}" if previous else "Новый продукт",
+        "version_type": source,
+        "timestamp": snapshot.taken_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "user": WATCHER_USER,
+    }
+
+
+def _tracked_products() -> set[str]:
+    # Только продукты с кнопками: о прочих в индексе пользователь всё равно не может спросить
+    return {product for builds in PRODUCT_BUTTONS.values() for product in builds.values()}
+
+
+def _tracked_modules() -> dict[str, str]:
+    # url -> модуль для модулей, входящих в POM какого-либо проекта
+    urls = {url for plan in get_plans().values() for url in plan.urls}
+    return {url: module for module, url in UNIFIED_POM_URLS.items() if url in urls}
+
+
+def diff_snapshots(previous: Snapshot, current: Snapshot) -> list[dict]:
+    releases = []
+    products = _tracked_products()
+    for product in _changed(previous.index, current.index):
+        if product not in products:
+            continue
+        old = previous.index.get(product)
+        if old is None or current.index[product] > old:
+            releases.append(_release(product, str(current.index[product]), old and str(old), "index", current))
+
+    modules = _tracked_modules()
+    for url in _changed(previous.pom_versions, current.pom_versions):
+        old, version = previous.pom_versions.get(url), current.pom_versions[url]
+        # Без известной прошлой версии не с чем сравнивать: это первая загрузка, а не новый релиз
+        if url not in modules or old in (None, POM_FETCH_ERROR) or version == POM_FETCH_ERROR:
+            continue
+        if _is_newer(version, old):
+            releases.append(_release(modules[url], version, old, "maven", current))
+
+    for release in releases:
+        WATCHER_CHANGES.inc(source=release["version_type"])
+    return releases
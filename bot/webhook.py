@@ -0,0 +1,88 @@
+import asyncio
+import hmac
+import json
+import logging
+import re
+import signal
+
+from telegram import Update
+from telegram.ext import Application
+
+from config import WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL, WEBHOOK_SECRET
+from http_server import HttpServer, Request, Response
+
+
+# Допустимый secret_token по правилам Telegram Bot API
+SECRET_RE = re.compile(r"[A-Za-z0-9_-]{1,256}")
+
+
+class WebhookConfigError(ValueError):
+    pass
+
+
+def check_webhook_config() -> None:
+    # Без секрета любой, кто достучится до порта, может прислать поддельный update — такой запуск не допускаем
+    if not WEBHOOK_SECRET:
+        raise WebhookConfigError("Для режима webhook нужен WEBHOOK_SECRET")
+    if not SECRET_RE.fullmatch(WEBHOOK_SECRET):
+        raise WebhookConfigError("WEBHOOK_SECRET: 1-256 символов из A-Z, a-z, 0-9, _ и -")
+
+
+def build_webhook_server(application: Application) -> HttpServer:
+    server = HttpServer(WEBHOOK_LISTEN, WEBHOOK_PORT)
+
+    async def handle_update(request: Request) -> Response:
+        token = request.headers.get("x-telegram-bot-api-secret-token", "")
+        if not hmac.compare_digest(token, WEBHOOK_SECRET):
+            return Response(403, b"Forbidden")
+        try:
+            update = Update.de_json(json.loads(request.body), application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            logging.warning(f"Некорректный update во вебхуке: {e}")
+            return Response(400, b"Bad Request")
+        # Отвечаем Telegram сразу, обработка идёт через очередь приложения
+        await application.update_queue.put(update)
+        return Response(200, b"OK")
+
+    server.route("POST", WEBHOOK_PATH, handle_update)
+    return server
+
+
+async def _serve(application: Application) -> None:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    server = build_webhook_server(application)
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        await server.start()
+        try:
+            if WEBHOOK_URL:
+                await application.bot.set_webhook(
+                    url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                    secret_token=WEBHOOK_SECRET,
+                    allowed_updates=Update.ALL_TYPES,
+                )
+                logging.info(f"Вебхук зарегистрирован: {WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH}")
+            else:
+                logging.info("WEBHOOK_URL не задан, вебхук в Telegram не регистрируется")
+            await stop_event.wait()
+        finally:
+            await server.stop()
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+    finally:
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+
+def run_webhook(application: Application) -> None:
+    check_webhook_config()
+    asyncio.run(_serve(application))
@@ -6,6 +6,16 @@ echo "🔄 Начинается деплой окружения и бота..."
 # Переход в директорию скрипта (корень проекта)
 cd "$(dirname "$0")"
 
+# Режим запуска: ./deploy.sh [polling|webhook], по умолчанию берётся BOT_MODE из .env
+BOT_MODE_ARG="${1:-}"
+if [ -n "$BOT_MODE_ARG" ]; then
+    if [ "$BOT_MODE_ARG" != "polling" ] && [ "$BOT_MODE_ARG" != "webhook" ]; then
+        echo "❌ Неизвестный режим '$BOT_MODE_ARG'. Использование: ./deploy.sh [polling|webhook]"
+        exit 1
+    fi
+    export BOT_MODE="$BOT_MODE_ARG"
+fi
+
 #############################
 # Часть 0. Проверка и установка Python 3.10 (3.10.12)
 #############################
@@ -26,45 +36,63 @@ fi
 
 echo "🔄 Деплой бота..."
 
+# Всё, что не требует остановки, готовим, пока старый процесс ещё отвечает пользователям:
+# бот недоступен только между kill и подключением нового процесса к Telegram.
+
+# Окружение пересобирается только при изменении requirements.txt. Новое собирается рядом (.venv.new),
+# чтобы не менять пакеты под работающим процессом, и подменяет старое уже после его остановки.
+# Пересборка с нуля заодно удаляет пакеты, исключённые из requirements.txt
+REQUIREMENTS_HASH=$(sha256sum requirements.txt | cut -d' ' -f1)
+NEW_VENV=""
+if [ -x ".venv/bin/python" ] && [ "$(cat .venv/.requirements.sha256 2>/dev/null)" = "$REQUIREMENTS_HASH" ]; then
+    echo "📦 Зависимости не менялись, установка пропущена."
+else
+    echo "📦 Сборка виртуального окружения с Python 3.10 и установка зависимостей..."
+    rm -rf .venv.new
+    python3.10 -m venv .venv.new
+    .venv.new/bin/python -m pip install --upgrade pip
+    .venv.new/bin/python -m pip install -r requirements.txt
+    echo "$REQUIREMENTS_HASH" > .venv.new/.requirements.sha256
+    NEW_VENV=1
+fi
+
+# Байткод заранее, чтобы новый процесс не компилировал модули при старте
+python3.10 -m compileall -q bot
+
 # Остановка старого процесса бота (если он запущен)
 if [ -f bot.pid ]; then
     OLD_PID=$(cat bot.pid)
     if ps -p $OLD_PID > /dev/null; then
         echo "🛑 Остановка старого процесса с PID $OLD_PID..."
-        kill $OLD_PID && echo "✅ Старый процесс остановлен."
+        kill $OLD_PID
+        # При остановке бот дописывает состояния диалогов в state.db — новый процесс должен их увидеть
+        for _ in $(seq 1 150); do
+            ps -p $OLD_PID > /dev/null || break
+            sleep 0.2
+        done
+        echo "✅ Старый процесс остановлен."
     fi
     rm -f bot.pid
 fi
 
-# Проверка и создание виртуального окружения с использованием python3.10
-if [ -d ".venv" ]; then
-    if [ -f ".venv/bin/activate" ]; then
-        echo "📦 Активация виртуального окружения..."
-        source .venv/bin/activate
-        VENV_PYTHON="python"
-    else
-        echo "⚠️ Файл активации (.venv/bin/activate) не найден. Используем .venv/bin/python3.10 напрямую."
-        VENV_PYTHON=".venv/bin/python3.10"
-    fi
-else
-    echo "Виртуальное окружение (.venv) не найдено. Создаем его с помощью Python 3.10..."
-    python3.10 -m venv .venv
-    if [ -f ".venv/bin/activate" ]; then
-        echo "📦 Активация виртуального окружения..."
-        source .venv/bin/activate
-        VENV_PYTHON="python"
-    else
-        echo "⚠️ Файл активации не найден. Используем .venv/bin/python3.10 напрямую."
-        VENV_PYTHON=".venv/bin/python3.10"
-    fi
+if [ -n "$NEW_VENV" ]; then
+    rm -rf .venv.old
+    [ -d ".venv" ] && mv .venv .venv.old
+    mv .venv.new .venv
+    # Пути в скриптах активации привязаны к каталогу окружения: пересоздаём их на новом месте, пакеты не трогаются
+    python3.10 -m venv --without-pip .venv
+    # У консольных скриптов пакетов (pip и др.) в шебанге остался путь .venv.new — переписываем его
+    for script in $(grep -lI "$PWD/.venv.new/bin/" .venv/bin/* || true); do
+        sed -i "1,3s|$PWD/.venv.new/bin/|$PWD/.venv/bin/|" "$script"
+    done
 fi
+VENV_PYTHON=".venv/bin/python"
 
-echo "Обновление pip и установка зависимостей проекта..."
-$VENV_PYTHON -m pip install --upgrade pip
-$VENV_PYTHON -m pip install -r requirements.txt
-
-echo "🚀 Запуск бота..."
+echo "🚀 Запуск бота (режим: ${BOT_MODE:-из .env})..."
 nohup $VENV_PYTHON bot/main.py > bot.log 2>&1 &
 echo $! > bot.pid
 
-echo "✅ Бот запущен! PID сохранён в bot.pid"
\ No newline at end of file
+# Старое окружение удаляем уже после запуска: это не влияет на простой
+rm -rf .venv.old
+
+echo "✅ Бот запущен! PID сохранён в bot.pid"